@@ -11,31 +11,47 @@ Features:
   * Tracks rolling-minute OHLCV for ML-based predictions
 """
 import asyncio
+import logging
 import math
+import os
 import traceback
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_DOWN, getcontext
 
+import numpy as np
 import pandas as pd
 from joblib import load
 from kucoin.client import Client
 from kucoin.asyncio import KucoinSocketManager
 from kucoin.exceptions import KucoinAPIException
 
+try:  # optional: compiled ONNX inference for the per-minute predictions
+    import onnxruntime as ort
+    from skl2onnx import to_onnx
+except ImportError:
+    ort = to_onnx = None
+
 from app.kc import kc
+from app import kcorderfeed, kcsocket
+from app.kcorderfeed import ORDER_TOPIC, BALANCE_TOPIC
 from app.logger_config import logger
 from app.db import (
     get_db,
     create_trade,
-    update_trade_status,
+    bulk_update_statuses,
+    list_open_trades,
     get_last_trade_by_symbol,
-    Trade
 )
 from app.config import settings
 
-from time import time
-from sqlalchemy import not_, or_
+from time import monotonic, time_ns
+
+# checked per call (isEnabledFor is a cached dict hit), so a runtime
+# level change is honoured; skips building debug args when DEBUG is off
+_debug = partial(logger.isEnabledFor, logging.DEBUG)
+_dbg   = logger.debug
 
 
 # ---------------------------------------------------------------------
@@ -66,8 +82,15 @@ prediction_high: float | None = None
 prediction_low:  float | None = None
 available_quote: float = 0.0   # e.g. USDT
 available_base:  float = 0.0   # e.g. KCS
-stop_requested: bool = False   # stop new BUYs, exit after close
+stop_event = asyncio.Event()    # set → stop new BUYs, exit after close
+_exited_position = asyncio.Event()  # set while flat; run_algo waits on it
+_exited_position.set()
+_loop: asyncio.AbstractEventLoop | None = None  # bound once in run_algo
 _last_known_balances: dict[str, float] = {}
+# top of book, refreshed from the /market/ticker WS feed in handle()
+_best_bid: float | None = None
+_best_ask: float | None = None
+_best_quote_at = 0.0  # monotonic() of the last bid/ask update
 
 # ---------------------------------------------------------------------
 # Precision & Constants
@@ -75,17 +98,51 @@ _last_known_balances: dict[str, float] = {}
 getcontext().prec = 18  # decimal precision
 MAX_ORDER_RETRIES    = 5
 INITIAL_RETRY_DELAY  = 1  # seconds
+NS_PER_MINUTE        = 60_000_000_000
+QUOTE_MAX_AGE_SECS   = 5.0  # older cached bid/ask is refetched over REST
 BASE_MIN_SIZE = BASE_INCREMENT = PRICE_INCREMENT = 0.0  # populated in run_algo
 
+# Separate pools so balance/status polling never queues ahead of
+# order submission on the shared default executor.
+_ORDER_EXEC = ThreadPoolExecutor(max_workers=2, thread_name_prefix="kc-order")
+_READ_EXEC  = ThreadPoolExecutor(max_workers=4, thread_name_prefix="kc-read")
+
+# Private order-update pushes (via the shared kcorderfeed socket):
+# place_and_confirm_order waits on these instead of polling
+# kc.get_order every 0.5 s.
+ORDER_REST_FALLBACK_SECS = 5.0  # re-check REST if the WS stays quiet
+_order_events: dict[str, asyncio.Event] = {}
+_order_last:   dict[str, dict] = {}
+
+# Terminal order statuses are queued here and written in batches by
+# _status_writer, so a burst of fills costs one commit instead of N.
+_status_queue: asyncio.Queue = asyncio.Queue()
+STATUS_FLUSH_SECS = 0.25
+STATUS_BATCH_MAX  = 32
+
+# Decimal/precision forms of the increments, also populated in run_algo
+_PRICE_INC_DEC: Decimal | None = None
+_BASE_INC_DEC:  Decimal | None = None
+_BASE_PREC: int = 0
+# power-of-ten price ticks are floored in integer tick units instead
+_PRICE_TICK_EXP: int | None = None  # e.g. 4 for 0.0001; None → Decimal path
+_PRICE_SCALE: int = 1
+_BASE_SCALE: int | None = None  # 10**_BASE_PREC for power-of-ten increments
+# format strings matching the exchange precision, e.g. "{:.4f}"
+_SIZE_FMT:  str = "{:.8f}"
+_PRICE_FMT: str = "{:.8f}"
+
 # ---------------------------------------------------------------------
 # Helper: fetch available balance
 # ---------------------------------------------------------------------
 
 #------------------ CACHING BALANCES FOR SOME TIME to avoid hammering kucoin ------------
 # balance‐cache globals
-_last_balance_fetch: float | None = None
+_last_balance_fetch: float | None = None  # time.monotonic() of last REST refresh
 _balance_cache: dict[str, float] = {}
 BALANCE_CACHE_TTL = 60.0  # seconds
+BALANCE_REST_TTL_NO_WS = 5.0  # REST backstop cadence while balance pushes are down
+_balance_ws_epoch = -1        # kcorderfeed.epoch() the cache was last resynced at
 #--------------------------------------------
 
 async def get_available(currency: str) -> float:
@@ -96,17 +153,20 @@ async def get_available(currency: str) -> float:
     Falls back to last known value.
 
     Logs every step for full visibility.
+
+    While the private balance WS is live it keeps _balance_cache
+    current; _refresh_balances() decides when REST has to step in.
     """
     global _last_balance_fetch, _balance_cache
 
-    now = time()
+    now = monotonic()
     # Only refresh if cache expired
     if _last_balance_fetch is None or (now - _last_balance_fetch) > BALANCE_CACHE_TTL:
-        logger.debug("[algo] | Balance cache stale or empty (last_fetch=%s), fetching fresh…", _last_balance_fetch)
+        if _debug():
+            _dbg("[algo] | Balance cache stale or empty (last_fetch=%s), fetching fresh…", _last_balance_fetch)
         try:
-            loop = asyncio.get_event_loop()
-            raw_accounts = await loop.run_in_executor(None, kc.get_accounts)
-            logger.debug("[algo] | Raw accounts from KuCoin: %r", raw_accounts)
+            loop = _loop
+            raw_accounts = await loop.run_in_executor(_READ_EXEC, kc.get_accounts)
 
             # Build cache only from 'trade' entries
             new_cache: dict[str, float] = {}
@@ -121,44 +181,206 @@ async def get_available(currency: str) -> float:
                         logger.warning("[algo] | Could not parse available=%r for %s", avail, acct)
             _balance_cache = new_cache
             _last_balance_fetch = now
-            logger.debug("[algo] | Rebuilt balance cache (trade accounts): %r", _balance_cache)
+            if _debug():
+                _dbg("[algo] | Rebuilt balance cache: %d trade accounts from %d entries",
+                     len(_balance_cache), len(raw_accounts))
 
         except Exception as e:
             logger.warning("[algo] | Balance fetch failed, using cached: %s", e)
 
     else:
         age = now - _last_balance_fetch
-        logger.debug("[algo] | Using cached balances (age=%.1fs)", age)
+        if _debug():
+            _dbg("[algo] | Using cached balances (age=%.1fs)", age)
 
     # Return the trade‐type available balance for this currency
     val = _balance_cache.get(currency, 0.0)
-    logger.debug("[algo] | Returning available[%s] = %.6f", currency, val)
+    if _debug():
+        _dbg("[algo] | Returning available[%s] = %.6f", currency, val)
     return val
 
+
+async def _refresh_balances() -> None:
+    """
+    Make _balance_cache trustworthy for this tick: REST-resync after the
+    private WS (re)subscribes (pushes were missed meanwhile), and poll REST
+    every BALANCE_REST_TTL_NO_WS while it is down or a balance is missing.
+    """
+    global _last_balance_fetch, _balance_ws_epoch
+    live = kcorderfeed.is_live()
+    ttl  = BALANCE_CACHE_TTL if live else BALANCE_REST_TTL_NO_WS
+    if live and kcorderfeed.epoch() != _balance_ws_epoch:
+        _balance_ws_epoch   = kcorderfeed.epoch()
+        _last_balance_fetch = None
+    elif QUOTE not in _balance_cache or BASE not in _balance_cache:
+        # absent after a fresh fetch just means no account (0); re-ask soon
+        ttl = min(ttl, BALANCE_REST_TTL_NO_WS)
+    if _last_balance_fetch is None or monotonic() - _last_balance_fetch > ttl:
+        _last_balance_fetch = None
+        await get_available(QUOTE)  # rebuilds the whole cache
+
+
+def _flush_statuses(items):
+    """Write queued (order_id, status) pairs in one transaction; last status per order wins."""
+    if not items:
+        return
+    updates = list(dict(items).items())
+    try:
+        with get_db() as db:
+            bulk_update_statuses(db, updates)
+    except Exception as e:
+        logger.error("[algo] | Failed to write %d order statuses: %s", len(updates), e)
+
+
+async def _status_writer():
+    """
+    Drain _status_queue every STATUS_FLUSH_SECS (or as soon as
+    STATUS_BATCH_MAX items are waiting) into bulk_update_statuses.
+    """
+    loop  = _loop
+    items = []
+    try:
+        while True:
+            items.append(await _status_queue.get())
+            deadline = loop.time() + STATUS_FLUSH_SECS
+            while len(items) < STATUS_BATCH_MAX:
+                try:
+                    items.append(_status_queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(_status_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            _flush_statuses(items)
+            items = []
+    finally:
+        # shutting down: persist whatever is still pending
+        while not _status_queue.empty():
+            items.append(_status_queue.get_nowait())
+        _flush_statuses(items)
+
+
+def handle_private(msg):
+    """
+    kcorderfeed listener for the shared private WS:
+      * /account/balance → 'trade' account updates into _balance_cache
+      * /spotMarket/tradeOrdersV2 → wake place_and_confirm_order waiters
+    """
+    topic = msg.get("topic")
+    data  = msg.get("data") or {}
+
+    if topic == ORDER_TOPIC:
+        oid = data.get("orderId")
+        if oid and data.get("status") == "done":
+            mapped = "canceled" if data.get("type") == "canceled" else "filled"
+            _status_queue.put_nowait((oid, mapped))
+        ev  = _order_events.get(oid)
+        if ev is not None:  # only orders we're confirming
+            _order_last[oid] = data
+            ev.set()
+        return
+
+    if topic != BALANCE_TOPIC:
+        return
+    cur   = data.get("currency")
+    event = data.get("relationEvent") or ""
+    if not cur or not event.startswith("trade."):
+        return
+    try:
+        _balance_cache[cur] = float(data.get("available", 0))
+    except (TypeError, ValueError):
+        logger.warning("[algo] | Could not parse balance push: %r", data)
+
 # ---------------------------------------------------------------------
 # Rolling-minute OHLCV buffer
 # ---------------------------------------------------------------------
-minList = deque(maxlen=5)
-current_bar = {
-    "minute": None,
-    "open":   None,
-    "high":   -math.inf,
-    "low":     math.inf,
-    "close":  None,
-    "volume": 0.0
-}
+# last 5 finished bars as a fixed (5, 5) ring: one row per bar
+_O, _H, _L, _C, _V = range(5)
+_bars = np.zeros((5, 5), dtype=np.float64)
+_bars_head = 0  # total bars written; next slot is _bars_head % 5
+_last_minute_ns: int | None = None  # bucket of the bar in progress
+# bar in progress as plain scalars: no dict hashing on the per-tick path
+_cb_open:  float | None = None
+_cb_high:  float = -math.inf
+_cb_low:   float =  math.inf
+_cb_close: float | None = None
+_cb_vol:   float = 0.0
 
 # ---------------------------------------------------------------------
 # Load ML models
 # ---------------------------------------------------------------------
 models_ready = False
 minH_model = minL_model = None
+predict_H = predict_L = None  # callables: (1, 5) float32 row → float
+
+# one reusable input row: [open, high, low, close, V]
+_FEAT_BUF = np.empty((1, 5), dtype=np.float32)
+
+def _fill_features(out, cur, prev):
+    """
+    Vectorized features for N bars at once: `cur`/`prev` are (N, 5) bar
+    rows (prev[k] precedes cur[k]); writes the (N, 5) model input to `out`.
+    """
+    np.divide(cur[:, :4], cur[:, _O:_O+1], out=out[:, :4])  # o,h,l,c / open
+    np.divide(cur[:, _O], prev[:, _O], out=out[:, 0])        # open / prev open
+    np.subtract(cur[:, _V], prev[:, _V], out=out[:, 4])      # volume delta
+
+def _drop_feature_names(model):
+    """
+    Models fitted on a DataFrame warn when predicting on a bare ndarray;
+    forget the fitted column names so _FEAT_BUF can be passed directly.
+    """
+    if getattr(model, "feature_names_in_", None) is not None:
+        try:
+            model.feature_names_in_ = None
+        except AttributeError:
+            pass  # e.g. a Pipeline exposing it as a read-only property
+    return model
+
+def _onnx_session(model, path: str):
+    """
+    Compile `model` to an ONNX Runtime session, caching the graph next
+    to the joblib file. Returns None if ONNX isn't installed or the
+    model can't be converted.
+    """
+    if ort is None:
+        return None
+    onnx_path = os.path.splitext(path)[0] + ".onnx"
+    try:
+        if (os.path.exists(onnx_path)
+                and os.path.getmtime(onnx_path) >= os.path.getmtime(path)):
+            graph = onnx_path
+        else:
+            graph = to_onnx(model, np.zeros((1, 5), dtype=np.float32)).SerializeToString()
+            try:
+                with open(onnx_path, "wb") as f:
+                    f.write(graph)
+            except OSError as e:
+                logger.warning("[algo] | Could not cache %s: %s", onnx_path, e)
+        return ort.InferenceSession(graph, providers=["CPUExecutionProvider"])
+    except Exception as e:
+        logger.warning("[algo] | ONNX conversion failed for %s, using sklearn: %s", path, e)
+        return None
+
+def _make_predictor(model, path: str):
+    sess = _onnx_session(model, path)
+    if sess is None:
+        return lambda X: float(model.predict(X)[0])
+    name = sess.get_inputs()[0].name
+    return lambda X: float(sess.run(None, {name: X})[0].ravel()[0])
 
 def load_models():
-    global models_ready, minH_model, minL_model
+    global models_ready, minH_model, minL_model, predict_H, predict_L
     try:
-        minH_model = load(MIN_MODEL_H_PATH)
-        minL_model = load(MIN_MODEL_L_PATH)
+        minH_model = _drop_feature_names(load(MIN_MODEL_H_PATH))
+        minL_model = _drop_feature_names(load(MIN_MODEL_L_PATH))
+        predict_H  = _make_predictor(minH_model, MIN_MODEL_H_PATH)
+        predict_L  = _make_predictor(minL_model, MIN_MODEL_L_PATH)
         models_ready = True
         logger.info("[algo] | Loaded models: %s, %s", MIN_MODEL_H_PATH, MIN_MODEL_L_PATH)
     except Exception as e:
@@ -182,9 +404,34 @@ trades = []
 # Helper: floor price to tick
 # ---------------------------------------------------------------------
 def floor_price_to_tick(p: float) -> str:
-    inc = Decimal(str(PRICE_INCREMENT))
-    floored = (Decimal(str(p)) // inc) * inc
-    return format(floored.quantize(inc, rounding=ROUND_DOWN), 'f')
+    if _PRICE_TICK_EXP is not None:
+        # round-then-correct instead of floor(): 0.29*100 is 28.999…
+        ticks = round(p * _PRICE_SCALE)
+        if ticks / _PRICE_SCALE > p:
+            ticks -= 1
+        return _PRICE_FMT.format(ticks / _PRICE_SCALE)
+    # non-decimal increments (e.g. 0.25) keep the exact Decimal floor
+    floored = Decimal(str(p)) // _PRICE_INC_DEC * _PRICE_INC_DEC
+    return format(floored.quantize(_PRICE_INC_DEC, rounding=ROUND_DOWN), 'f')
+
+async def _top_of_book() -> tuple[float | None, float | None]:
+    """
+    (bestBid, bestAsk) from the ticker WS cache while it is fresh, else
+    from REST get_ticker; (None, None) if neither is available.
+    """
+    global _best_bid, _best_ask, _best_quote_at
+    if (_best_bid is not None and _best_ask is not None
+            and monotonic() - _best_quote_at <= QUOTE_MAX_AGE_SECS):
+        return _best_bid, _best_ask
+    try:
+        raw = await _loop.run_in_executor(_READ_EXEC, kc.get_ticker, SYMBOL)
+        t = raw.get("data", raw)
+        _best_bid, _best_ask = float(t["bestBid"]), float(t["bestAsk"])
+        _best_quote_at = monotonic()
+        return _best_bid, _best_ask
+    except Exception as e:
+        logger.warning("[algo] | cached bid/ask stale and get_ticker failed: %s", e)
+        return None, None
 
 # ---------------------------------------------------------------------
 # Place order with retry & record
@@ -193,62 +440,62 @@ def floor_price_to_tick(p: float) -> str:
 async def place_order_with_retry(side: str, price: float | None = None, **kwargs):
     delay = INITIAL_RETRY_DELAY
     for attempt in range(1, MAX_ORDER_RETRIES + 1):
-        logger.debug(
-            "[algo] | place_order_with_retry: attempt %d/%d for %s (price=%s, size=%s)",
-            attempt, MAX_ORDER_RETRIES, side, price, kwargs.get("size")
-        )
+        if _debug():
+            _dbg(
+                "[algo] | place_order_with_retry: attempt %d/%d for %s (price=%s, size=%s)",
+                attempt, MAX_ORDER_RETRIES, side, price, kwargs.get("size")
+            )
         try:
+            loop = _loop
             # choose order type
             if ORDER_TYPE == "limit":
-                logger.debug("[algo] | ORDER_TYPE=limit")
                 if price is None:
                     raise ValueError("Limit orders require a price")
-                try:
-                    tick = kc.get_ticker(SYMBOL)
-                    bd, ba = float(tick["bestBid"]), float(tick["bestAsk"])
+                bd, ba = await _top_of_book()
+                if bd is not None and ba is not None:
                     raw_price = bd * (1 + LIMIT_SLIPPAGE) if side == "buy" else ba * (1 - LIMIT_SLIPPAGE)
-                    logger.debug(
-                        "[algo] | fetched ticker for slippage: bestBid=%s bestAsk=%s → raw_price=%s",
-                        bd, ba, raw_price
-                    )
-                except Exception as e:
+                    if _debug():
+                        _dbg(
+                            "[algo] | ticker for slippage: bestBid=%s bestAsk=%s → raw_price=%s",
+                            bd, ba, raw_price
+                        )
+                else:
                     raw_price = price
                     logger.warning(
-                        "[algo] | failed to fetch ticker for slippage: %s; using price=%s",
-                        e, raw_price
+                        "[algo] | no fresh bid/ask for slippage; using price=%s",
+                        raw_price
                     )
                 use_price = floor_price_to_tick(raw_price)
-                logger.debug("[algo] | sending LIMIT %s order @ %s size=%s", side, use_price, kwargs["size"])
-                raw = kc.create_limit_order(
+                if _debug():
+                    _dbg("[algo] | sending LIMIT %s order @ %s size=%s", side, use_price, kwargs["size"])
+                raw = await loop.run_in_executor(_ORDER_EXEC, partial(
+                    kc.create_limit_order,
                     side=side, symbol=SYMBOL,
                     price=use_price, size=kwargs["size"], timeInForce="GTC"
-                )
+                ))
             else:
-                logger.debug("[algo] | ORDER_TYPE=market")
-                logger.debug("[algo] | sending MARKET %s order size=%s", side, kwargs["size"])
-                raw = kc.create_market_order(
+                if _debug():
+                    _dbg("[algo] | sending MARKET %s order size=%s", side, kwargs["size"])
+                raw = await loop.run_in_executor(_ORDER_EXEC, partial(
+                    kc.create_market_order,
                     side=side, symbol=SYMBOL, size=kwargs["size"]
-                )
+                ))
 
-            logger.debug("[algo] | raw response from KuCoin: %r", raw)
             order = raw.get("data", raw)
-            logger.debug("[algo] | unwrapped order payload: %r", order)
-
             rs = (order.get("status") or "").lower()
-            logger.debug("[algo] | KuCoin reported status=%r", rs)
             if rs in ("done", "filled"):
                 initial_status = "filled"
             elif rs in ("canceled", "cancelled"):
                 initial_status = "canceled"
             else:
                 initial_status = "open"
-            logger.debug("[algo] | normalized initial_status = %r", initial_status)
 
             oid = order.get("orderId") or order.get("id")
-            logger.debug(
-                "[algo] | recording trade in DB: order_id=%s, status=%s, side=%s, price=%s, size=%s",
-                oid, initial_status, side, price, kwargs["size"]
-            )
+            if _debug():
+                _dbg(
+                    "[algo] | recording trade: order_id=%s status=%r→%s side=%s price=%s size=%s",
+                    oid, rs, initial_status, side, price, kwargs["size"]
+                )
             with get_db() as db:
                 create_trade(
                     db,
@@ -277,47 +524,64 @@ async def place_order_with_retry(side: str, price: float | None = None, **kwargs
                     side.upper(), MAX_ORDER_RETRIES
                 )
                 raise
-            logger.debug("[algo] | retrying %s order in %.1f seconds", side, delay)
+            if _debug():
+                _dbg("[algo] | retrying %s order in %.1f seconds", side, delay)
             await asyncio.sleep(delay)
             delay *= 2
 
 
 # ─── Confirm fill/cancel & update final status ────────────────────────────
+async def _wait_order_done(oid: str, ev: asyncio.Event):
+    """Return once the order WS has pushed a 'done' update for `oid`."""
+    while (_order_last.get(oid) or {}).get("status") != "done":
+        await ev.wait()
+        ev.clear()
+
+
 async def place_and_confirm_order(side: str, price: float | None = None, **kwargs):
-    logger.debug("[algo] | place_and_confirm_order: side=%s price=%s size=%s", side, price, kwargs.get("size"))
     order = await place_order_with_retry(side, price=price, **kwargs)
     oid = order.get("orderId") or order.get("id")
-    logger.debug("[algo] | tracking order_id=%s until filled/canceled", oid)
+    if _debug():
+        _dbg("[algo] | tracking order_id=%s until filled/canceled", oid)
+
+    ev = _order_events.setdefault(oid, asyncio.Event())
+    try:
+        return await _confirm_order(oid, ev)
+    finally:
+        _order_events.pop(oid, None)
+        _order_last.pop(oid, None)
 
+
+async def _confirm_order(oid: str, ev: asyncio.Event):
+    """REST-confirm `oid`, woken by order WS pushes between checks."""
     start_time = datetime.utcnow()
     while True:
         try:
-            raw = await asyncio.get_event_loop().run_in_executor(None, kc.get_order, oid)
+            raw = await _loop.run_in_executor(_READ_EXEC, kc.get_order, oid)
             status = raw.get("data", raw)
-            logger.debug("[algo] | fetched status for %s: %r", oid, status)
         except KucoinAPIException as e:
             msg = str(e).lower()
             logger.warning("[algo] | error fetching order %s: %s", oid, e)
             if "does not exist" in msg:
-                logger.debug("[algo] | order %s not yet indexed, retrying...", oid)
+                if _debug():
+                    _dbg("[algo] | order %s not yet indexed, retrying...", oid)
                 await asyncio.sleep(0.5)
                 continue
             raise
 
         rs = (status.get("status") or "").lower()
-        logger.debug("[algo] | raw status=%r for %s", rs, oid)
         if rs in ("done", "filled"):
             mapped = "filled"
         elif rs in ("canceled", "cancelled"):
             mapped = "canceled"
         else:
             mapped = "open"
-        logger.debug("[algo] | mapped status=%r for %s", mapped, oid)
+        if _debug():
+            _dbg("[algo] | order %s: isActive=%s status=%r → %s",
+                 oid, status.get("isActive"), rs, mapped)
 
         if not status.get("isActive", False):
-            logger.debug("[algo] | order %s is no longer active, updating to %s", oid, mapped)
-            with get_db() as db:
-                update_trade_status(db, oid, mapped)
+            _status_queue.put_nowait((oid, mapped))
 
             if mapped == "filled":
                 logger.info("[algo] | Order %s confirmed filled", oid)
@@ -327,15 +591,28 @@ async def place_and_confirm_order(side: str, price: float | None = None, **kwarg
             raise RuntimeError(f"Order {oid} {mapped}")
 
         elapsed = (datetime.utcnow() - start_time).total_seconds()
-        logger.debug("[algo] | waiting for %s: elapsed=%.1f/60", oid, elapsed)
+        if _debug():
+            _dbg("[algo] | waiting for %s: elapsed=%.1f/60", oid, elapsed)
         if elapsed > 60:
             logger.warning("[algo] | Order %s timed out after 60s, canceling", oid)
-            kc.cancel_order(oid)
-            with get_db() as db:
-                update_trade_status(db, oid, "canceled")
+            await _loop.run_in_executor(_ORDER_EXEC, kc.cancel_order, oid)
+            _status_queue.put_nowait((oid, "canceled"))
             raise RuntimeError(f"Order {oid} canceled after timeout")
 
-        await asyncio.sleep(0.5)
+        if (_order_last.get(oid) or {}).get("status") == "done":
+            # WS already saw it finish; give REST a moment to catch up
+            await asyncio.sleep(0.5)
+            continue
+
+        # sleep until the order WS says it's done, re-checking REST
+        # only as a fallback if no push arrives
+        try:
+            await asyncio.wait_for(
+                _wait_order_done(oid, ev),
+                min(ORDER_REST_FALLBACK_SECS, max(60 - elapsed, 0) + 0.1)
+            )
+        except asyncio.TimeoutError:
+            pass
 
 
 # ---------------------------------------------------------------------
@@ -344,7 +621,9 @@ async def place_and_confirm_order(side: str, price: float | None = None, **kwarg
 async def handle(msg):
     global prediction_high, prediction_low, in_position, DV_before_trade
     global available_quote, available_base, wins, losses, total_PnL
-    global buy_time, high_water, BP, SP, exit_price
+    global buy_time, high_water, BP, SP, exit_price, _bars_head
+    global _best_bid, _best_ask, _best_quote_at, _last_minute_ns
+    global _cb_open, _cb_high, _cb_low, _cb_close, _cb_vol
 
     try:
         topic = msg.get("topic","")
@@ -352,9 +631,10 @@ async def handle(msg):
         if not data:
             return
 
-        # 1) update balances
-        available_quote = await get_available(QUOTE)
-        available_base  = await get_available(BASE)
+        # 1) update balances (private balance WS, REST backstop)
+        await _refresh_balances()
+        available_quote = _balance_cache.get(QUOTE, 0.0)
+        available_base  = _balance_cache.get(BASE, 0.0)
 
         # 2) extract price + ts
         if topic.startswith(f"/market/match:{SYMBOL}"):
@@ -362,34 +642,45 @@ async def handle(msg):
         elif topic.startswith(f"/market/ticker:{SYMBOL}"):
             price = float(data.get("bestAsk",data.get("price",0)))
             ts_ns = data.get("time")
+            # keep top of book for order pricing (REST only once it goes stale)
+            if "bestBid" in data:
+                _best_bid = float(data["bestBid"])
+                _best_ask = float(data["bestAsk"])
+                _best_quote_at = monotonic()
         else:
             return
 
-        ts = pd.to_datetime(int(ts_ns),unit="ns")
-        minute = ts.floor("min")
-
-        # 3) new minute → finalize previous
-        if current_bar["minute"] is None or minute>current_bar["minute"]:
-            if current_bar["minute"] is not None:
-                minList.append((current_bar["minute"],current_bar.copy()))
-                if models_ready and len(minList)>=2:
-                    _,b1 = minList[-1]; _,b2 = minList[-2]
-                    feat = [
-                        b1["open"]/b2["open"],
-                        b1["high"]/b1["open"],
-                        b1["low"]/b1["open"],
-                        b1["close"]/b1["open"],
-                        b1["volume"]-b2["volume"]
-                    ]
-                    X = pd.DataFrame([feat], columns=["open","high","low","close","V"])
-                    curH = float(minH_model.predict(X)[0])
-                    curL = float(minL_model.predict(X)[0])
+        # minute bucket in raw ns ints; no pandas on the per-tick path
+        ts_ns  = int(ts_ns)
+        minute = ts_ns - ts_ns % NS_PER_MINUTE
+
+        # 3) same minute as the last tick (the common case): just extend
+        #    the bar in progress, no datetime work at all
+        if _last_minute_ns is not None and minute <= _last_minute_ns:
+            if price > _cb_high:
+                _cb_high = price
+            if price < _cb_low:
+                _cb_low = price
+            _cb_close = price
+            _cb_vol  += float(data.get("size",0))
+        else:
+            # new minute → finalize previous
+            if _last_minute_ns is not None:
+                ts = datetime.utcfromtimestamp(ts_ns / 1e9)
+                _bars[_bars_head % 5] = (_cb_open, _cb_high, _cb_low, _cb_close, _cb_vol)
+                _bars_head += 1
+                if models_ready and _bars_head>=2:
+                    i1 = (_bars_head-1) % 5; i2 = (_bars_head-2) % 5
+                    _fill_features(_FEAT_BUF, _bars[i1:i1+1], _bars[i2:i2+1])
+                    b1 = _bars[i1]
+                    curH = predict_H(_FEAT_BUF)
+                    curL = predict_L(_FEAT_BUF)
                     prediction_high, prediction_low = curH, curL
-                    hl_diff = b1["high"]/b1["low"]
+                    hl_diff = b1[_H]/b1[_L]
                     logger.info("[algo] | PRED H=%.6f L=%.6f hl_diff=%.6f",curH,curL,hl_diff)
 
                     # ── BUY ───────────────────────────────────────────
-                    if (not in_position and not stop_requested
+                    if (not in_position and not stop_event.is_set()
                         and hl_diff>=HL_DIFF_THRESHOLD
                         and curH>=0 and curL>0):
 
@@ -397,21 +688,25 @@ async def handle(msg):
                             logger.error("[algo] | no %s to BUY (bal=%.6f)",QUOTE,available_quote)
                         else:
                             # limit price
-                            try:
-                                tk = kc.get_ticker(SYMBOL)
-                                bb = float(tk["bestBid"])
-                                raw_p = bb*(1+LIMIT_SLIPPAGE)
-                            except:
-                                raw_p = price
+                            bid, _ = await _top_of_book()
+                            raw_p = (bid*(1+LIMIT_SLIPPAGE)
+                                     if bid is not None else price)
                             price_str = floor_price_to_tick(raw_p)
-                            price_dec  = Decimal(price_str)
-
-                            # 98% notional cap
-                            max_notional = Decimal(str(available_quote))
-                            qty_dec      = (max_notional/price_dec).quantize(
-                                Decimal(str(BASE_INCREMENT)), rounding=ROUND_DOWN
-                            )
-                            qty = float(qty_dec)
+                            price_flt = float(price_str)
+
+                            # 98% notional cap, floored to whole base increments
+                            if _BASE_SCALE is not None:
+                                units = math.floor(available_quote / price_flt * _BASE_SCALE)
+                                # the float quotient can round up across an integer:
+                                # re-check exactly so units*price never exceeds the balance
+                                if (units > 0 and Decimal(units) * Decimal(price_str)
+                                        > Decimal(str(available_quote)) * _BASE_SCALE):
+                                    units -= 1
+                                qty   = units / _BASE_SCALE
+                            else:
+                                qty = float((Decimal(str(available_quote)) / Decimal(price_str))
+                                            .quantize(_BASE_INC_DEC, rounding=ROUND_DOWN))
+                            size_str = _SIZE_FMT.format(qty)
 
                             if qty < BASE_MIN_SIZE:
                                 logger.warning("[algo] | qty=%.6f < baseMin=%.6f",qty,BASE_MIN_SIZE)
@@ -422,14 +717,15 @@ async def handle(msg):
                                 try:
                                     filled = await place_and_confirm_order(
                                         side="buy",
-                                        price=float(price_dec),
-                                        size=f"{qty:.8f}"
+                                        price=price_flt,
+                                        size=size_str
                                     )
                                 except Exception as e:
                                     logger.warning("[algo] | BUY failed: %s; continuing", e)
                                 else:
                                     fp, fs = float(filled["dealPrice"]), float(filled["dealSize"])
                                     in_position=True; BP=fp; buy_time=ts; high_water=fp
+                                    _exited_position.clear()
                                     exit_price=BP*PROFIT_TARGET_MULT
                                     logger.info("[algo] | 🔵 BUY FILLED qty=%.6f @ %.6f",fs,fp)
 
@@ -442,10 +738,8 @@ async def handle(msg):
                             or curH<0
                             or ts>buy_time+timedelta(minutes=TIME_STOP_MINUTES)):
 
-                            raw_q = available_base
-                            prec  = max(0,-int(math.log10(BASE_INCREMENT or 1e-6)))
-                            qty   = round(math.floor(raw_q/(BASE_INCREMENT or 1e-6))*
-                                          (BASE_INCREMENT or 1e-6), prec)
+                            raw_q = Decimal(str(available_base))
+                            qty   = float(raw_q // _BASE_INC_DEC * _BASE_INC_DEC)
                             if qty<=BASE_MIN_SIZE:
                                 logger.error("[algo] | not enough %s to SELL",BASE)
                             else:
@@ -455,7 +749,7 @@ async def handle(msg):
                                     filled = await place_and_confirm_order(
                                         side="sell",
                                         price=price,
-                                        size=f"{qty:.8f}"
+                                        size=_SIZE_FMT.format(qty)
                                     )
                                 except Exception as e:
                                     logger.warning("[algo] | SELL failed: %s; continuing", e)
@@ -464,6 +758,7 @@ async def handle(msg):
                                     DV_after = await get_available(QUOTE)
                                     pnl = DV_after - DV_before_trade
                                     in_position=False; wins+=(1 if pnl>=0 else 0)
+                                    _exited_position.set()
                                     losses+=(1 if pnl<0 else 0); total_PnL+=pnl
                                     logger.info("[algo] | 🔴 SELL FILLED qty=%.6f @ %.6f pnl=%.6f",
                                                 fs,fp,pnl)
@@ -480,15 +775,9 @@ async def handle(msg):
                                         )
 
             # start new bar
-            current_bar.update(minute=minute, open=price, high=price,
-                               low=price, close=price,
-                               volume=float(data.get("size",0)))
-        else:
-            # update in-progress
-            current_bar["high"]  = max(current_bar["high"],price)
-            current_bar["low"]   = min(current_bar["low"],price)
-            current_bar["close"] = price
-            current_bar["volume"]+= float(data.get("size",0))
+            _last_minute_ns = minute
+            _cb_open = _cb_high = _cb_low = _cb_close = price
+            _cb_vol  = float(data.get("size",0))
 
     except Exception:
         logger.error("[algo] | Exception in handle():\n%s", traceback.format_exc())
@@ -500,10 +789,10 @@ async def fetch_order_with_retry(order_id: str, max_retries: int = 3, base_delay
     Try kc.get_order(order_id) up to max_retries times, with exponential backoff,
     unwrap the 'data' envelope if present, and return the order dict.
     """
-    loop = asyncio.get_event_loop()
+    loop = _loop
     for attempt in range(1, max_retries + 1):
         try:
-            raw = await loop.run_in_executor(None, kc.get_order, order_id)
+            raw = await loop.run_in_executor(_READ_EXEC, kc.get_order, order_id)
             # KuCoin wraps payload under "data"
             return raw.get("data", raw)
         except KucoinAPIException as e:
@@ -521,35 +810,32 @@ async def sync_open_trades():
     """
     Find all trades in the DB whose status isn't yet final
     (i.e. NOT 'filled' or 'canceled'), fetch their real status
-    from KuCoin (with retries), update the DB accordingly,
-    and log a summary.
+    from KuCoin (with retries), update the DB accordingly
+    in a single transaction, and log a summary.
     """
     with get_db() as db:
-        pending = (
-            db.query(Trade)
-              .filter(not_(Trade.status.in_(["filled", "canceled"])))
-              .all()
-        )
+        pending = list_open_trades(db)
 
     total   = len(pending)
-    updated = 0
+    updates: list[tuple[str, str]] = []
     logger.info("[algo] | sync_open_trades: found %d trade(s) to sync", total)
 
     for t in pending:
-        logger.debug("[algo] | Checking order %s: local status=%r", t.order_id, t.status)
+        if _debug():
+            _dbg("[algo] | Checking order %s: local status=%r", t.order_id, t.status)
         try:
             data      = await fetch_order_with_retry(t.order_id)
-            logger.info(f"[algo] | Order id's response is : {data}")
+            logger.info("[algo] | Order id's response is : %s", data)
             op_type   = (data.get("opType") or "").lower()
             is_active = data.get("isActive", True)
-            logger.debug("[algo] | Raw data for %s: %r", t.order_id, data)
         except Exception as e:
             logger.warning("[algo] | Could not fetch order %s: %s", t.order_id, e)
             continue
 
         # if still active, skip
         if is_active:
-            logger.debug("[algo] |   → order %s still active on KuCoin", t.order_id)
+            if _debug():
+                _dbg("[algo] |   → order %s still active on KuCoin", t.order_id)
             continue
 
         # map opType to our status
@@ -565,14 +851,13 @@ async def sync_open_trades():
                 "[algo] |   → update %s: %r → %r",
                 t.order_id, t.status, real_status
             )
-            with get_db() as db:
-                update_trade_status(db, t.order_id, real_status)
-            updated += 1
+            updates.append((t.order_id, real_status))
 
             # bootstrap in_position if a BUY just filled
-            if t.type.lower() == "buy" and real_status == "filled":
+            if t.type == "buy" and real_status == "filled":
                 global in_position, BP, buy_time, high_water, exit_price, DV_before_trade
                 in_position     = True
+                _exited_position.clear()
                 BP              = t.price
                 buy_time        = t.timestamp
                 high_water      = BP
@@ -580,11 +865,17 @@ async def sync_open_trades():
                 DV_before_trade = await get_available(QUOTE)
                 logger.info("[algo] | Restored in-position: BUY @ %.6f", BP)
         else:
-            logger.debug("[algo] |   → no change for %s (still %r)", t.order_id, t.status)
+            if _debug():
+                _dbg("[algo] |   → no change for %s (still %r)", t.order_id, t.status)
+
+    # one transaction / one fsync for the whole batch
+    if updates:
+        with get_db() as db:
+            bulk_update_statuses(db, updates)
 
     logger.info(
         "[algo] | sync_open_trades complete: %d/%d trade(s) updated",
-        updated, total
+        len(updates), total
     )
 
 
@@ -593,7 +884,11 @@ async def sync_open_trades():
 # ---------------------------------------------------------------------
 async def run_algo():
     global BASE_MIN_SIZE, BASE_INCREMENT, PRICE_INCREMENT
+    global _PRICE_INC_DEC, _BASE_INC_DEC, _BASE_PREC
+    global _PRICE_TICK_EXP, _PRICE_SCALE, _BASE_SCALE, _SIZE_FMT, _PRICE_FMT
+    global _loop
 
+    _loop = asyncio.get_running_loop()
     syms = kc.get_symbols()
     entry = next((s for s in syms if s["symbol"] == SYMBOL), None)
     if not entry:
@@ -602,6 +897,21 @@ async def run_algo():
     BASE_MIN_SIZE   = float(entry["baseMinSize"])
     BASE_INCREMENT  = float(entry["baseIncrement"])
     PRICE_INCREMENT = float(entry["priceIncrement"])
+    # hoist the per-order Decimal work out of the hot path
+    _PRICE_INC_DEC  = Decimal(entry["priceIncrement"])
+    _BASE_INC_DEC   = Decimal(entry["baseIncrement"])
+    _BASE_PREC      = max(0, -_BASE_INC_DEC.normalize().as_tuple().exponent)
+    base = _BASE_INC_DEC.normalize().as_tuple()
+    _BASE_SCALE     = (10 ** _BASE_PREC
+                       if base.digits == (1,) and base.exponent <= 0 else None)
+    inc = _PRICE_INC_DEC.normalize().as_tuple()
+    if inc.digits == (1,) and inc.exponent <= 0:
+        _PRICE_TICK_EXP = -inc.exponent
+        _PRICE_SCALE    = 10 ** _PRICE_TICK_EXP
+    else:
+        _PRICE_TICK_EXP = None
+    _SIZE_FMT  = f"{{:.{_BASE_PREC}f}}"
+    _PRICE_FMT = f"{{:.{max(0, -inc.exponent)}f}}"
     logger.info(
         "[algo] | Tick sizes → baseMin=%.8f baseInc=%.8f priceInc=%.8f",
         BASE_MIN_SIZE, BASE_INCREMENT, PRICE_INCREMENT
@@ -615,53 +925,80 @@ async def run_algo():
     # Resume open BUY only if it was already marked as 'filled'
     with get_db() as db:
         last = get_last_trade_by_symbol(db, SYMBOL)
-    if last and last.type.lower() == "buy" and last.status == "filled":
+    if last and last.type == "buy" and last.status == "filled":
         global in_position, BP, buy_time, high_water, exit_price
         in_position = True
+        _exited_position.clear()
         BP          = last.price
         buy_time    = last.timestamp
         high_water  = BP
         exit_price  = BP * PROFIT_TARGET_MULT
         logger.info("[algo] | Resumed BUY @ %.6f time=%s", BP, buy_time)
 
+    # seed the balance cache once; the private WS keeps it fresh afterwards
+    await get_available(QUOTE)
+
     logger.info("[algo] | Connecting to KuCoin feeds for %s", SYMBOL)
-    loop   = asyncio.get_event_loop()
+    loop   = _loop
     client = Client(
         api_key=API_KEY,
         api_secret=API_SECRET,
         passphrase=API_PASSPHRASE
     )
+    public_topics = (f"/market/match:{SYMBOL}", f"/market/ticker:{SYMBOL}")
     ksm = await KucoinSocketManager.create(loop, client, handle, private=False)
-    await ksm.subscribe(f"/market/match:{SYMBOL}")
-    await ksm.subscribe(f"/market/ticker:{SYMBOL}")
+    for topic in public_topics:
+        await ksm.subscribe(topic)
+
+    # order + balance pushes ride kcorderfeed's supervised private socket
+    kcorderfeed.add_listener(handle_private)
+    await kcorderfeed.start()
 
     async def minute_ticker():
         while True:
-            now    = pd.Timestamp.utcnow()
-            target = now.ceil("min") + pd.Timedelta(seconds=0.5)
-            await asyncio.sleep((target - now).total_seconds())
+            now    = time_ns()
+            target = now - now % NS_PER_MINUTE + NS_PER_MINUTE + 500_000_000
+            await asyncio.sleep((target - now) / 1e9)
             await sync_open_trades()
             await handle({
                 "topic": f"/market/ticker:{SYMBOL}",
                 "data": {
-                    "price": current_bar["close"],
-                    "time":  int(pd.Timestamp.utcnow().value)
+                    "price": _cb_close,
+                    "time":  time_ns()
                 }
             })
 
-    asyncio.create_task(minute_ticker())
+    ticker = asyncio.create_task(minute_ticker())
+    writer = asyncio.create_task(_status_writer())
 
     try:
-        while True:
-            await asyncio.sleep(0.2)
-            if stop_requested and not in_position:
-                logger.info("[algo] | Sell-only complete; shutting down")
-                break
+        # no polling: sleep until asked to stop, then until we're flat
+        await stop_event.wait()
+        while in_position:
+            await _exited_position.wait()
+        logger.info("[algo] | Sell-only complete; shutting down")
     finally:
-        await ksm.close()
+        # stop everything that would keep feeding handle()/_status_queue
+        kcorderfeed.remove_listener(handle_private)
+        ticker.cancel()
+        await kcsocket.close(ksm, public_topics, "[algo]")
+        writer.cancel()
+        for task in (ticker, writer):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error("[algo] | %s task failed during shutdown: %s", task.get_coro().__name__, e)
+        logger.info("[algo] | 🔌 Feeds closed")
 
 
 if __name__=="__main__":
+    try:
+        import uvloop  # ships with uvicorn[standard]; Linux/macOS only
+        uvloop.install()
+    except ImportError:
+        logger.info("[algo] | uvloop not available; using default asyncio loop")
     try:
         asyncio.run(run_algo())
     except KeyboardInterrupt:
@@ -1,45 +1,80 @@
 # app/algoapis.py
 
 import asyncio
+import csv
 from contextlib import suppress
 from datetime import datetime
 
-import pandas as pd
-from fastapi import APIRouter, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+
+try:  # optional: columnar Feather/Arrow IPC export of the trade log
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
 
 import app.algo as algo
 from app.algo import run_algo, SYMBOL
+from app.config import settings
 from app.logger_config import logger
+from app.cache import acached
 
 # DB imports
-from app.db import get_db, list_trades_by_symbol
+from app.db import (
+    get_db, get_session, list_trade_tuples_by_symbol, list_sells_by_symbol, Trade
+)
 
 router = APIRouter(prefix="/algo", tags=["algo"])
 _algo_task: asyncio.Task | None = None
 
 
+def _sell_rows(db: Session):
+    """Stream (price, timestamp, pnl) for this symbol's SELL trades."""
+    return list_sells_by_symbol(db, SYMBOL, (Trade.price, Trade.timestamp, Trade.pnl))
+
+
 def _save_trades():
     """
-    Export all SELL trades from the DB into live_trades.csv,
-    including their PnL and timestamp.
+    Export all SELL trades from the DB, including their PnL and
+    timestamp, as live_trades.arrow (Feather v2) or live_trades.csv
+    depending on settings.TRADES_EXPORT_FORMAT.
     """
-    with get_db() as db:
-        trades = list_trades_by_symbol(db, SYMBOL, skip=0, limit=10_000)
+    if settings.TRADES_EXPORT_FORMAT == "arrow":
+        if feather is not None:
+            return _save_trades_arrow()
+        logger.warning("[algo] | pyarrow not installed; exporting trades as CSV")
+    _save_trades_csv()
 
-    # Only include sells in the CSV, with the fields your UI expects
-    rows = []
-    for t in trades:
-        if t.type.lower() == "sell":
-            rows.append({
-                "Sell Price": t.price,
-                "Sell Time":  t.timestamp.isoformat(),
-                "PnL":         t.pnl or 0.0,
-            })
 
-    df = pd.DataFrame(rows)
-    df.to_csv("live_trades.csv", index=False)
-    logger.info("[algo] | Saved %d trades to live_trades.csv", len(df))
+def _save_trades_arrow():
+    prices, times, pnls = [], [], []
+    with get_db() as db:
+        for price, ts, pnl in _sell_rows(db):
+            prices.append(price)
+            times.append(ts)
+            pnls.append(pnl or 0.0)
+    table = pa.table({
+        "Sell Price": pa.array(prices, pa.float64()),
+        "Sell Time":  pa.array(times,  pa.timestamp("us")),
+        "PnL":        pa.array(pnls,   pa.float64()),
+    })
+    feather.write_feather(table, "live_trades.arrow", compression="lz4")
+    logger.info("[algo] | Saved %d trades to live_trades.arrow", table.num_rows)
+
+
+def _save_trades_csv():
+    # Only include sells in the CSV, with the fields your UI expects;
+    # rows are streamed straight from the cursor to disk
+    n = 0
+    with get_db() as db, open("live_trades.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Sell Price", "Sell Time", "PnL"])
+        for price, ts, pnl in _sell_rows(db):
+            writer.writerow((price, ts.isoformat(), pnl or 0.0))
+            n += 1
+    logger.info("[algo] | Saved %d trades to live_trades.csv", n)
 
 
 @router.post("/start")
@@ -56,7 +91,7 @@ async def start_algo():
         raise HTTPException(400, "Algorithm already running")
 
     # reset sell-only flag
-    algo.stop_requested = False
+    algo.stop_event.clear()
 
     # start the trading loop
     _algo_task = asyncio.create_task(run_algo())
@@ -73,26 +108,30 @@ async def stop_algo():
         logger.warning("[algo] | Stop requested but algorithm not running")
         raise HTTPException(400, "Algorithm not running")
 
-    algo.stop_requested = True
+    algo.stop_event.set()
     return {"status": "stopping"}
 
 
+def _sell_stats(db: Session) -> tuple:
+    """(count, wins, losses, net PnL) over this symbol's SELL trades."""
+    pnl = func.coalesce(Trade.pnl, 0.0)
+    return tuple(list_sells_by_symbol(db, SYMBOL, (
+        func.count().label("n"),
+        func.coalesce(func.sum(case((pnl >= 0, 1), else_=0)), 0).label("wins"),
+        func.coalesce(func.sum(case((pnl <  0, 1), else_=0)), 0).label("losses"),
+        func.coalesce(func.sum(pnl), 0.0).label("net"),
+    )).one())
+
+
 @router.get("/status")
-async def algo_status():
+async def algo_status(db: Session = Depends(get_session)):
     logger.info("[algo] | GET /algo/status called")
 
     # 1) Is the algo task still running?
     running = bool(_algo_task and not _algo_task.done())
 
-    # 2) Recompute stats from the DB
-    with get_db() as db:
-        all_trades = list_trades_by_symbol(db, SYMBOL, skip=0, limit=10_000)
-
-    sells = [t for t in all_trades if t.type.lower() == "sell"]
-    trades_taken = len(sells)
-    wins         = sum(1 for t in sells if (t.pnl or 0) >= 0)
-    losses       = sum(1 for t in sells if (t.pnl or 0) <  0)
-    net_PnL      = sum(t.pnl or 0 for t in sells)
+    # 2) Recompute stats from the DB in one aggregate query
+    trades_taken, wins, losses, net_PnL = await acached("status", lambda: _sell_stats(db))
 
     # 3) Build and return response
     resp = {
@@ -110,21 +149,30 @@ async def algo_status():
     return resp
 
 @router.get("/trades")
-async def get_trades():
+async def get_trades(db: Session = Depends(get_session)):
     """
     Return all past trades for the chart markers.
     """
-    with get_db() as db:
-        all_trades = list_trades_by_symbol(db, SYMBOL, skip=0, limit=1000)
+    return await acached("trades", lambda: _chart_trades(db))
+
+
+def _chart_trades(db: Session) -> list[dict]:
+    # newest 1000 (walks ix_trades_symbol_ts backwards), then oldest-first:
+    # setMarkers needs its markers sorted by time
+    rows = list_trade_tuples_by_symbol(
+        db, SYMBOL, (Trade.ts_epoch, Trade.price, Trade.type),
+        limit=1000, order_by=Trade.timestamp.desc()
+    )
+    rows.reverse()
 
     return [
         {
           # LightweightCharts expects time in seconds:
-          "time": int(t.timestamp.timestamp()),
-          "price": t.price,
-          "type":  t.type.lower(),
+          "time": ts_epoch,
+          "price": price,
+          "type":  type_,
         }
-        for t in all_trades
+        for ts_epoch, price, type_ in rows
     ]
 
 @router.post("/close")
@@ -138,7 +186,7 @@ async def close_position():
     global _algo_task
 
     # Tell the algo: no more buys, exit after current position closes
-    algo.stop_requested = True
+    algo.stop_event.set()
 
     # If it’s not already running, (re)start it
     if not _algo_task or _algo_task.done():
@@ -175,7 +223,8 @@ async def shutdown_event():
         _algo_task.cancel()
         with suppress(asyncio.CancelledError):
             await _algo_task
-    _save_trades()
+    # DB scan + file write off the event loop
+    await asyncio.to_thread(_save_trades)
     logger.info("[algo] | Shutdown cleanup complete")
 
 
@@ -0,0 +1,34 @@
+# app/cache.py
+import asyncio
+from threading import Lock
+
+from cachetools import TTLCache
+
+# short-lived cache for the trade reads the UI polls; writes clear it
+query_cache: TTLCache = TTLCache(maxsize=16, ttl=1.0)
+_lock = Lock()
+_generation = 0  # bumped by invalidate(); results computed across a bump are stale
+
+
+async def acached(key: str, compute):
+    """Return query_cache[key]; on a miss run the blocking compute() in a worker thread."""
+    with _lock:
+        try:
+            return query_cache[key]
+        except KeyError:
+            pass
+        gen = _generation
+    value = await asyncio.to_thread(compute)
+    with _lock:
+        # a write landed while computing: serve this result, don't cache it
+        if gen == _generation:
+            query_cache[key] = value
+    return value
+
+
+def invalidate() -> None:
+    """Drop every cached trade read (call after inserting trades)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        query_cache.clear()
@@ -15,6 +15,10 @@ class Settings:
     DEFAULT_PAIR = os.getenv("DEFAULT_PAIR", "KCS-USDT")
     ORDER_TYPE: str = os.getenv("ORDER_TYPE", "market")
     LIMIT_SLIPPAGE: float = float(os.getenv("LIMIT_SLIPPAGE", 0.2))
+    # shutdown trade export: "arrow" (live_trades.arrow, needs pyarrow) or "csv"
+    TRADES_EXPORT_FORMAT = os.getenv("TRADES_EXPORT_FORMAT", "arrow").lower()
+    # per-worker cap on concurrent /ws/{pair} subscribers for one pair
+    WS_MAX_CLIENTS_PER_PAIR = int(os.getenv("WS_MAX_CLIENTS_PER_PAIR", 500))
 
     KUCOIN_API_KEY       = os.getenv("KUCOIN_API_KEY", "")
     KUCOIN_API_SECRET    = os.getenv("KUCOIN_API_SECRET", "")
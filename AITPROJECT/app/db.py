@@ -1,17 +1,22 @@
 # app/db.py
 
 import os
+from collections.abc import Iterator
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Float, DateTime, desc
+    create_engine, event, bindparam, select, update, inspect, text,
+    Column, Integer, String, Float, DateTime, Index, CheckConstraint, desc
 )
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.engine import Result, Row
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 
 from app.logger_config import logger  # ← added import
+from app.cache import invalidate as invalidate_cache
 
 # ——————————————————————————————————————————————
 # CONFIGURATION
@@ -26,23 +31,41 @@ Path(DATABASE_FILE).parent.mkdir(parents=True, exist_ok=True)
 
 DATABASE_URL = f"sqlite:///{DATABASE_FILE}"
 
-logger.debug(f"[db] Using DATABASE_URL = {DATABASE_URL}")
+logger.debug("[db] Using DATABASE_URL = %s", DATABASE_URL)
 
 # Ensure the file (and parent dir) exist before SQLAlchemy touches it
 db_dir = os.path.dirname(DATABASE_FILE)
 if db_dir and not os.path.isdir(db_dir):
     os.makedirs(db_dir, exist_ok=True)
-    logger.debug(f"[db] Created directory for DB: {db_dir}")
+    logger.debug("[db] Created directory for DB: %s", db_dir)
 if not os.path.exists(DATABASE_FILE):
     open(DATABASE_FILE, "a").close()
-    logger.debug(f"[db] Touched new database file: {DATABASE_FILE}")
+    logger.debug("[db] Touched new database file: %s", DATABASE_FILE)
 
+# Pooled, persistent connections: PRAGMAs run once per connection, not
+# per session. Not StaticPool: request handlers, to_thread workers and
+# the algo executors would all share one connection (and transaction).
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},  # SQLite only
+    poolclass=QueuePool,
+    pool_size=5,
+    max_overflow=5,
 )
 logger.debug("[db] Engine created")
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, _conn_record) -> None:
+    """WAL + NORMAL sync: one fsync per checkpoint instead of per commit."""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB memory-mapped reads
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+    cursor.close()
+
 SessionLocal = sessionmaker(
     autoflush=False,
     autocommit=False,
@@ -61,12 +84,26 @@ class Trade(Base):
     id        = Column(Integer,   primary_key=True, index=True)
     order_id  = Column(String,    nullable=False)     # KuCoin order ID
     status    = Column(String,    nullable=False)     # open, filled, canceled
-    type      = Column(String,    nullable=False)     # 'buy' or 'sell'
+    type      = Column(String,    nullable=False)     # 'buy' or 'sell', always lowercase
     symbol    = Column(String,    nullable=False)
     price     = Column(Float,     nullable=False)
     quantity  = Column(Float,     nullable=False)
     timestamp = Column(DateTime,  nullable=False)
     pnl       = Column(Float,     nullable=True)      # profit/loss for a SELL
+    ts_epoch  = Column(Integer,   nullable=True)      # int(timestamp.timestamp()), for the chart
+
+    __table_args__ = (
+        Index("ix_trades_status", "status"),
+        # SQLite walks this backwards for ORDER BY timestamp DESC
+        Index("ix_trades_symbol_ts", "symbol", "timestamp"),
+        Index("ix_trades_symbol_type", "symbol", "type"),
+        # only enforced on newly created tables; init_db normalizes old rows
+        CheckConstraint("type IN ('buy', 'sell')", name="ck_trades_type"),
+    )
+
+
+# Non-final statuses; a positive IN lets SQLite use ix_trades_status
+OPEN_STATUSES = ("open", "new", "active")
 
 
 # ——————————————————————————————————————————————
@@ -76,9 +113,50 @@ def init_db() -> None:
     """Create tables if they don’t exist."""
     logger.info("[db] Initializing database (creating tables if needed)…")
     Base.metadata.create_all(bind=engine)
+    _migrate_ts_epoch()
+    _normalize_trade_types()
+    # create_all skips indexes on tables that already exist
+    for index in Trade.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        # superseded by ix_trades_symbol_type (never picked for bound 'sell')
+        conn.execute(text("DROP INDEX IF EXISTS ix_trades_sells"))
     logger.info("[db] Database initialized")
 
 
+def _migrate_ts_epoch() -> None:
+    """Add + backfill trades.ts_epoch on databases created before it existed."""
+    cols = {c["name"] for c in inspect(engine).get_columns("trades")}
+    with engine.begin() as conn:
+        if "ts_epoch" not in cols:
+            logger.info("[db] Adding trades.ts_epoch column")
+            conn.execute(text("ALTER TABLE trades ADD COLUMN ts_epoch INTEGER"))
+        trades = Trade.__table__
+        rows = conn.execute(
+            trades.select()
+              .with_only_columns(trades.c.id, trades.c.timestamp)
+              .where(trades.c.ts_epoch.is_(None))
+        ).all()
+        if rows:
+            conn.execute(
+                update(trades)
+                  .where(trades.c.id == bindparam("b_id"))
+                  .values(ts_epoch=bindparam("b_ts")),
+                [{"b_id": i, "b_ts": int(ts.timestamp())} for i, ts in rows]
+            )
+            logger.info("[db] Backfilled ts_epoch on %d trade(s)", len(rows))
+
+
+def _normalize_trade_types() -> None:
+    """Lowercase trades.type rows written before inserts normalized it."""
+    with engine.begin() as conn:
+        n = conn.execute(
+            text("UPDATE trades SET type = lower(type) WHERE type != lower(type)")
+        ).rowcount
+    if n:
+        logger.info("[db] Lowercased type on %d trade(s)", n)
+
+
 # ——————————————————————————————————————————————
 # SESSION MANAGEMENT
 # ——————————————————————————————————————————————
@@ -94,6 +172,12 @@ def get_db() -> Session:
         logger.debug("[db] Session closed")
 
 
+def get_session() -> Iterator[Session]:
+    """FastAPI dependency: one Session per request (`Depends(get_session)`)."""
+    with get_db() as db:
+        yield db
+
+
 # ——————————————————————————————————————————————
 # CRUD HELPERS
 # ——————————————————————————————————————————————
@@ -110,21 +194,23 @@ def create_trade(
     pnl: float | None = None,
 ) -> Trade:
     """Insert a new trade row into the trades table."""
-    logger.debug(f"[db] create_trade → order_id={order_id}, status={status}")
+    logger.debug("[db] create_trade → order_id=%s, status=%s", order_id, status)
     trade = Trade(
         order_id=order_id,
         status=status,
-        type=type,
+        type=type.lower(),
         symbol=symbol,
         price=price,
         quantity=quantity,
         timestamp=timestamp,
         pnl=pnl,
+        ts_epoch=int(timestamp.timestamp()),
     )
     db.add(trade)
     db.commit()
     db.refresh(trade)
-    logger.info(f"[db] Recorded trade {trade.id} ({order_id}) as {status}")
+    invalidate_cache()
+    logger.info("[db] Recorded trade %s (%s) as %s", trade.id, order_id, status)
     return trade
 
 
@@ -134,22 +220,43 @@ def update_trade_status(
     new_status: str
 ) -> Trade | None:
     """Update the status of an existing trade by its order_id."""
-    logger.debug(f"[db] update_trade_status → order_id={order_id}, new_status={new_status}")
+    logger.debug("[db] update_trade_status → order_id=%s, new_status=%s", order_id, new_status)
     trade = db.query(Trade).filter(Trade.order_id == order_id).first()
     if trade:
         old = trade.status
         trade.status = new_status
         db.commit()
         db.refresh(trade)
-        logger.info(f"[db] Updated trade {trade.id} ({order_id}): {old} → {new_status}")
+        logger.info("[db] Updated trade %s (%s): %s → %s", trade.id, order_id, old, new_status)
     else:
-        logger.warning(f"[db] update_trade_status: no trade found for order_id={order_id}")
+        logger.warning("[db] update_trade_status: no trade found for order_id=%s", order_id)
     return trade
 
 
+def bulk_update_statuses(
+    db: Session,
+    updates: list[tuple[str, str]]
+) -> None:
+    """Apply many (order_id, new_status) pairs in one executemany + commit."""
+    if not updates:
+        return
+    logger.debug("[db] bulk_update_statuses → %d update(s)", len(updates))
+    trades = Trade.__table__
+    stmt = (
+        update(trades)
+          .where(trades.c.order_id == bindparam("b_order_id"))
+          .values(status=bindparam("b_status"))
+    )
+    db.execute(stmt, [
+        {"b_order_id": oid, "b_status": status} for oid, status in updates
+    ])
+    db.commit()
+    logger.info("[db] Bulk-updated %d trade status(es)", len(updates))
+
+
 def get_trade(db: Session, trade_id: int) -> Trade | None:
     """Return a single trade by its primary key."""
-    logger.debug(f"[db] get_trade → id={trade_id}")
+    logger.debug("[db] get_trade → id=%s", trade_id)
     return db.query(Trade).filter(Trade.id == trade_id).first()
 
 
@@ -160,7 +267,7 @@ def list_trades(
     limit: int = 100
 ) -> list[Trade]:
     """Return a paginated list of trades."""
-    logger.debug(f"[db] list_trades → skip={skip} limit={limit}")
+    logger.debug("[db] list_trades → skip=%s limit=%s", skip, limit)
     return db.query(Trade).offset(skip).limit(limit).all()
 
 
@@ -172,7 +279,7 @@ def list_trades_by_symbol(
     limit: int = 100
 ) -> list[Trade]:
     """Return a paginated list of trades filtered by symbol."""
-    logger.debug(f"[db] list_trades_by_symbol → symbol={symbol} skip={skip} limit={limit}")
+    logger.debug("[db] list_trades_by_symbol → symbol=%s skip=%s limit=%s", symbol, skip, limit)
     return (
         db.query(Trade)
           .filter(Trade.symbol == symbol)
@@ -182,12 +289,62 @@ def list_trades_by_symbol(
     )
 
 
+def list_trade_tuples_by_symbol(
+    db: Session,
+    symbol: str,
+    columns: tuple,
+    *,
+    limit: int = 100,
+    order_by=None
+) -> list[Row]:
+    """
+    Return only `columns` (e.g. Trade.price, …) as plain Row tuples; no ORM objects.
+    Without `order_by` the row order (and which rows survive `limit`) is
+    whatever index SQLite picks.
+    """
+    logger.debug("[db] list_trade_tuples_by_symbol → symbol=%s limit=%s", symbol, limit)
+    stmt = select(*columns).where(Trade.symbol == symbol)
+    if order_by is not None:
+        stmt = stmt.order_by(order_by)
+    return db.execute(stmt.limit(limit)).all()
+
+
+def list_sells_by_symbol(
+    db: Session,
+    symbol: str,
+    columns: tuple,
+    *,
+    limit: int | None = None
+) -> Result:
+    """
+    Stream `columns` over SELL trades for `symbol` (aggregates work too);
+    served by ix_trades_symbol_type.
+    """
+    logger.debug("[db] list_sells_by_symbol → symbol=%s limit=%s", symbol, limit)
+    stmt = select(*columns).where(
+        Trade.symbol == symbol, Trade.type == "sell"
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return db.execute(stmt.execution_options(yield_per=1000))
+
+
+def list_open_trades(db: Session) -> list[Trade]:
+    """Return all trades whose status is not yet final."""
+    logger.debug("[db] list_open_trades")
+    return (
+        db.query(Trade)
+          .filter(Trade.status.in_(OPEN_STATUSES))
+          .all()
+    )
+
+
 def get_last_trade_by_symbol(
     db: Session,
     symbol: str
 ) -> Trade | None:
     """Return the most recent Trade for `symbol`, or None if none exist."""
-    logger.debug(f"[db] get_last_trade_by_symbol → symbol={symbol}")
+    logger.debug("[db] get_last_trade_by_symbol → symbol=%s", symbol)
     return (
         db.query(Trade)
           .filter(Trade.symbol == symbol)
@@ -1,12 +1,17 @@
 # app/kc.py
 import asyncio
+import heapq
+import itertools
 import os
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from kucoin.client import Client
 from kucoin.exceptions import KucoinAPIException
+from sqlalchemy.orm import Session
 from app.logger_config import logger
-from app.db import get_db, get_last_trade_by_symbol
+from app.db import get_session, get_last_trade_by_symbol
+from app.cache import acached
+from app import kcorderfeed
 
 
 router = APIRouter(prefix="/kc", tags=["kucoin"])
@@ -28,6 +33,10 @@ kc = Client(
     sandbox    = SANDBOX
 )
 
+POLL_TIMEOUT_SECS  = 30
+POLL_RECHECK_SECS  = 5.0   # REST re-check while waiting on the order WS
+POLL_MAX_BACKOFF   = 4.0   # cap for REST-only polling
+
 # ─── MODELS ────────────────────────────────────────────────────────────────
 class MarketOrderRequest(BaseModel):
     symbol: str
@@ -51,7 +60,7 @@ class LimitOrderRequest(BaseModel):
 async def kucoin_health(request: Request):
     logger.info("[kc] | GET /kc/health called from %s", request.client.host)
     try:
-        resp = kc.get_status()
+        resp = await asyncio.to_thread(kc.get_status)
         data = resp.get("data", {})
         logger.info("[kc] | KuCoin status: %s", data)
         return {"status": "ok", "service_status": data}
@@ -68,7 +77,7 @@ async def get_nonzero_balances(request: Request):
     logger.info("[kc] | GET /kc/balances called from %s", request.client.host)
     try:
         result = []
-        for acct in kc.get_accounts():
+        for acct in await asyncio.to_thread(kc.get_accounts):
             bal   = float(acct["balance"])
             avail = float(acct.get("available", 0))
             if bal > 0:
@@ -88,7 +97,7 @@ async def get_nonzero_balances(request: Request):
 async def get_ticker(symbol: str, request: Request):
     logger.info("[kc] | GET /kc/ticker/%s called from %s", symbol, request.client.host)
     try:
-        data = kc.get_ticker(symbol)
+        data = await asyncio.to_thread(kc.get_ticker, symbol)
         price = float(data["price"])
         logger.info("[kc] | Ticker %s price: %s", symbol, price)
         return {"symbol": symbol, "price": price}
@@ -104,7 +113,8 @@ async def get_ticker(symbol: str, request: Request):
 async def market_buy(req: MarketOrderRequest, request: Request):
     logger.info("[kc] | POST /kc/order/market-buy called: %s", req.json())
     try:
-        order = kc.create_market_order(
+        order = await asyncio.to_thread(
+            kc.create_market_order,
             symbol=req.symbol, side="buy", funds=req.funds
         )
         oid = order.get("orderId")
@@ -124,13 +134,41 @@ async def poll_order(req: PollOrderRequest, request: Request):
     logger.info("[kc] | POST /kc/order/poll called: %s", req.json())
     oid = req.order_id
     sym = req.symbol
+    loop = asyncio.get_running_loop()
     try:
-        for i in range(30):
-            info = kc.get_order(oid, symbol=sym)
-            if not info.get("isActive", True):
-                logger.info("[kc] | Order %s filled after %d checks", oid, i+1)
+        # WS push resolves `fut`; while the private WS is live REST only
+        # re-checks, otherwise it polls with backoff
+        fut      = await kcorderfeed.watch(oid)
+        deadline = loop.time() + POLL_TIMEOUT_SECS
+        delay    = 0.5
+        checks   = 0
+        try:
+            while True:
+                info = await asyncio.to_thread(kc.get_order, oid, symbol=sym)
+                checks += 1
+                if not info.get("isActive", True):
+                    logger.info("[kc] | Order %s filled after %d checks", oid, checks)
+                    return {"orderId": oid, "filled": True}
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                if kcorderfeed.is_live():
+                    wait = POLL_RECHECK_SECS
+                else:
+                    wait  = delay
+                    delay = min(delay * 2, POLL_MAX_BACKOFF)
+                if fut is None:
+                    await asyncio.sleep(min(wait, remaining))
+                    continue
+                try:
+                    await asyncio.wait_for(asyncio.shield(fut), min(wait, remaining))
+                except asyncio.TimeoutError:
+                    continue
+                logger.info("[kc] | Order %s filled (WS push)", oid)
                 return {"orderId": oid, "filled": True}
-            await asyncio.sleep(1)
+        finally:
+            kcorderfeed.unwatch(oid)
         logger.warning("[kc] | Order %s not filled after timeout", oid)
         return {"orderId": oid, "filled": False, "message": "timeout"}
     except Exception as e:
@@ -142,7 +180,7 @@ async def poll_order(req: PollOrderRequest, request: Request):
 async def cancel_order(order_id: str, request: Request):
     logger.info("[kc] | POST /kc/order/cancel/%s called", order_id)
     try:
-        kc.cancel_order(order_id)
+        await asyncio.to_thread(kc.cancel_order, order_id)
         logger.info("[kc] | Order %s canceled", order_id)
         return {"orderId": order_id, "canceled": True}
     except KucoinAPIException as e:
@@ -157,7 +195,7 @@ async def cancel_order(order_id: str, request: Request):
 async def get_fills(symbol: str, order_id: str, request: Request):
     logger.info("[kc] | GET /kc/order/fills/%s/%s called", symbol, order_id)
     try:
-        fills = kc.get_fills(symbol=symbol, order_id=order_id)
+        fills = await asyncio.to_thread(kc.get_fills, symbol=symbol, order_id=order_id)
         logger.info("[kc] | Returning %d fills for %s", len(fills), order_id)
         return {"symbol": symbol, "orderId": order_id, "fills": fills}
     except KucoinAPIException as e:
@@ -180,14 +218,20 @@ async def get_all_orders(request: Request, limit: int = 20):
         return []
 
     try:
-        resp_active  = kc.get_orders(symbol=None, status="active", page=1, limit=limit)
+        # both buckets in parallel: one round-trip of wall time, not two
+        resp_active, resp_done = await asyncio.gather(
+            asyncio.to_thread(kc.get_orders, symbol=None, status="active", page=1, limit=limit),
+            asyncio.to_thread(kc.get_orders, symbol=None, status="done",   page=1, limit=limit),
+        )
         items_active = extract_items(resp_active)
-        resp_done    = kc.get_orders(symbol=None, status="done",   page=1, limit=limit)
         items_done   = extract_items(resp_done)
 
-        all_items = items_active + items_done
-        all_items.sort(key=lambda o: o.get("createdAt", 0), reverse=True)
-        trimmed   = all_items[:limit]
+        # newest `limit` across both buckets, no merged list or full sort
+        trimmed = heapq.nlargest(
+            limit,
+            itertools.chain(items_active, items_done),
+            key=lambda o: o.get("createdAt", 0),
+        )
 
         logger.info("[kc] | Returning %d orders (active+done)", len(trimmed))
         return {"orders": trimmed}
@@ -203,7 +247,7 @@ async def get_all_orders(request: Request, limit: int = 20):
 async def has_active_orders(request: Request):
     logger.info("[kc] | GET /kc/orders/active_status from %s", request.client.host)
     try:
-        resp = kc.get_orders(symbol=None, status="active", page=1, limit=10)
+        resp = await asyncio.to_thread(kc.get_orders, symbol=None, status="active", page=1, limit=10)
         items = resp.get("items") or resp.get("data", {}).get("items", [])
         return {"has_active_orders": len(items) > 0}
     except KucoinAPIException as e:
@@ -221,12 +265,12 @@ async def get_trade_history(symbol: str, request: Request):
     logger.info("[kc] | GET /kc/trade-history/%s from %s", sym, client_ip)
 
     try:
-        trades = kc.get_trade_histories(sym)
+        trades = await asyncio.to_thread(kc.get_trade_histories, sym)
         if not trades:
             alt = sym.replace("-", "_")
             if alt != sym:
                 logger.info("[kc] | No trades for %s, retrying with %s", sym, alt)
-                trades = kc.get_trade_histories(alt)
+                trades = await asyncio.to_thread(kc.get_trade_histories, alt)
         logger.info("[kc] | Returning %d trades for %s", len(trades), sym)
         return {"symbol": sym, "trades": trades}
     except KucoinAPIException as e:
@@ -240,7 +284,7 @@ async def get_trade_history(symbol: str, request: Request):
 async def get_my_fills(request: Request, limit: int = 20):
     logger.info("[kc] | GET /kc/my-fills?limit=%d from %s", limit, request.client.host)
     try:
-        resp = kc.get_orders(symbol=None, status="done", page=1, limit=limit)
+        resp = await asyncio.to_thread(kc.get_orders, symbol=None, status="done", page=1, limit=limit)
         orders = resp.get("items", [])
 
         fills = []
@@ -273,7 +317,8 @@ async def get_my_fills(request: Request, limit: int = 20):
 async def market_sell(req: MarketSellRequest, request: Request):
     logger.info("[kc] | POST /kc/order/market-sell called: %s", req.json())
     try:
-        order = kc.create_market_order(
+        order = await asyncio.to_thread(
+            kc.create_market_order,
             symbol=req.symbol, side="sell", size=req.size
         )
         oid    = order.get("orderId")
@@ -292,7 +337,8 @@ async def market_sell(req: MarketSellRequest, request: Request):
 async def limit_buy(req: LimitOrderRequest, request: Request):
     logger.info("[kc] | POST /kc/order/limit-buy called: %s", req.json())
     try:
-        order = kc.create_limit_order(
+        order = await asyncio.to_thread(
+            kc.create_limit_order,
             symbol=req.symbol,
             side="buy",
             price=req.price,
@@ -314,7 +360,8 @@ async def limit_buy(req: LimitOrderRequest, request: Request):
 async def limit_sell(req: LimitOrderRequest, request: Request):
     logger.info("[kc] | POST /kc/order/limit-sell called: %s", req.json())
     try:
-        order = kc.create_limit_order(
+        order = await asyncio.to_thread(
+            kc.create_limit_order,
             symbol=req.symbol,
             side="sell",
             price=req.price,
@@ -332,14 +379,18 @@ async def limit_sell(req: LimitOrderRequest, request: Request):
         raise HTTPException(500, str(e))
 
 @router.get("/orders/open_position")
-async def has_open_position(request: Request):
+async def has_open_position(request: Request, db: Session = Depends(get_session)):
     """
     Return true if our last trade in the DB was a BUY (i.e. we have an open position),
     false otherwise.
     """
     logger.info("[kc] | GET /kc/orders/open_position from %s", request.client.host)
-    with get_db() as db:
-        last = get_last_trade_by_symbol(db, settings.DEFAULT_PAIR)
+    return {"has_open_position": await acached("open_position", lambda: _last_trade_is_buy(db))}
+
+
+def _last_trade_is_buy(db: Session) -> bool:
+    last = get_last_trade_by_symbol(db, settings.DEFAULT_PAIR)
+    return bool(last and last.type == "buy")
+
 
-    has_open = bool(last and last.type.lower() == "buy")
-    return {"has_open_position": has_open}
\ No newline at end of file
+router.add_event_handler("shutdown", kcorderfeed.close)
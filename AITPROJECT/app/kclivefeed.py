@@ -3,14 +3,23 @@
 run_ws(pair, stop_evt)
   • streams KuCoin /market/match:<pair> ticks
   • publishes into in-memory broadcaster channel price_feed:<pair>
+    as packed little-endian (ts_ns: u64, price: f64, size: f64) bytes
 """
 
-import asyncio, sys, traceback
+import asyncio, struct, sys, traceback
 from kucoin.client import Client
 from kucoin.asyncio import KucoinSocketManager
+from app import kcsocket
 from app.pubsub import broadcast
 from app.logger_config import logger
 
+# one 24-byte record per tick; static/js/websocket.js unpacks the same layout
+TICK_STRUCT = struct.Struct("<Qdd")
+_PACK = TICK_STRUCT.pack
+
+# subscribed match topic → broadcaster channel, one entry per running pair
+topic_to_channel: dict[str, str] = {}
+
 async def run_ws(pair: str, stop_evt: asyncio.Event):
     loop = asyncio.get_event_loop()
     # public data only; no creds needed
@@ -18,22 +27,27 @@ async def run_ws(pair: str, stop_evt: asyncio.Event):
 
     topic   = f"/market/match:{pair}"
     channel = f"price_feed:{pair}"
+    topic_to_channel[topic] = channel
 
     async def handle(msg):
         if stop_evt.is_set():
             return  # bail early if asked to stop
 
         # only forward real match data
-        if msg.get("topic") == topic and msg.get("data"):
-            d       = msg["data"]
-            ts      = d.get("time")
-            price   = d.get("price")
-            size    = d.get("size", "")
-            payload = f"{ts},{price},{size}"
+        ch = topic_to_channel.get(msg.get("topic"))
+        if ch is None:
+            return
+        d = msg.get("data")
+        if not d:
+            return
+        ts      = d.get("time")
+        price   = d.get("price")
+        size    = d.get("size")
+        payload = _PACK(int(ts), float(price), float(size or 0))
 
-            # publish via in-memory broadcaster
-            await broadcast.publish(channel=channel, message=payload)
-            logger.debug("[kclive] | TICK %s  %s", pair, payload)
+        # publish via in-memory broadcaster
+        await broadcast.publish(channel=ch, message=payload)
+        logger.debug("[kclive] | TICK %s  %s,%s,%s", pair, ts, price, size)
 
     logger.info("[kclive] | 🚀 Connecting WS for %s", pair)
     ksm = None
@@ -41,9 +55,8 @@ async def run_ws(pair: str, stop_evt: asyncio.Event):
         ksm = await KucoinSocketManager.create(loop, client, handle, private=False)
         await ksm.subscribe(topic)
 
-        # keep the subscription alive until stopped
-        while not stop_evt.is_set():
-            await asyncio.sleep(0.2)
+        # keep the subscription alive until stopped (no polling)
+        await stop_evt.wait()
 
     except Exception:
         logger.error(
@@ -53,16 +66,10 @@ async def run_ws(pair: str, stop_evt: asyncio.Event):
         )
 
     finally:
+        topic_to_channel.pop(topic, None)
         if ksm:
-            # clean unsubscribe & close
-            try:
-                await ksm.unsubscribe(topic)
-            except Exception:
-                pass
-            try:
-                await ksm.close()
-            except Exception:
-                pass
+            # clean unsubscribe & close (KucoinSocketManager has no close())
+            await kcsocket.close(ksm, (topic,), "[kclive]")
 
         logger.info("[kclive] | 🔌 WS task finished for %s", pair)
 
@@ -0,0 +1,167 @@
+# app/kcorderfeed.py
+"""
+The process's one private KuCoin WS (/spotMarket/tradeOrdersV2 and
+/account/balance), supervised and resubscribed after reconnects.
+
+watch(order_id) / unwatch(order_id) / is_live()
+  • lazily opens the socket on first use
+  • resolves a per-order future when that order's 'done' push arrives
+  • is_live() is True only while the socket is open *and* subscribed;
+    callers keep REST polling at full rate otherwise
+add_listener(cb) / remove_listener(cb)
+  • cb(msg) is called for every private push (orders and balances);
+    while listeners are registered a dead socket is re-created
+"""
+
+import asyncio
+from time import monotonic
+
+from kucoin.client import Client
+from kucoin.asyncio import KucoinSocketManager
+from app import kcsocket
+from app.config import settings
+from app.logger_config import logger
+
+ORDER_TOPIC   = "/spotMarket/tradeOrdersV2"
+BALANCE_TOPIC = "/account/balance"
+TOPICS        = (ORDER_TOPIC, BALANCE_TOPIC)
+SUPERVISE_SECS = 0.5  # how often the supervisor checks the socket
+RETRY_SECS     = 30.0 # wait before re-creating a socket manager that died
+
+_pending: dict[str, asyncio.Future] = {}
+_listeners: list = []
+_ksm: KucoinSocketManager | None = None
+_supervisor: asyncio.Task | None = None
+_subscribed_sock = None   # the live socket TOPICS were sent on
+_epoch = 0                # bumped on every (re)subscribe
+_next_attempt = 0.0
+_connect_lock = asyncio.Lock()
+
+
+async def _handle(msg):
+    for cb in _listeners:
+        try:
+            cb(msg)
+        except Exception as e:
+            logger.error("[kcorders] | Listener %r failed: %s", cb, e)
+    if msg.get("topic") != ORDER_TOPIC:
+        return
+    data = msg.get("data") or {}
+    if data.get("status") != "done":
+        return
+    fut = _pending.get(data.get("orderId"))
+    if fut is not None and not fut.done():
+        fut.set_result(data)
+
+
+def epoch() -> int:
+    """Changes whenever TOPICS are (re)subscribed: pushes may have been missed before it."""
+    return _epoch
+
+
+def is_live() -> bool:
+    """True while private pushes can actually arrive."""
+    return (_ksm is not None and _subscribed_sock is not None
+            and kcsocket.open_socket(_ksm) is _subscribed_sock)
+
+
+async def _supervise(ksm: KucoinSocketManager) -> None:
+    """(Re)subscribe whenever a new socket comes up; forget `ksm` once it is dead."""
+    global _ksm, _subscribed_sock, _next_attempt, _epoch
+    try:
+        while True:
+            sock = kcsocket.open_socket(ksm)
+            if sock is not None and sock is not _subscribed_sock:
+                # send only once the socket is open so subscribe() never
+                # sits in python-kucoin's 1 s retry sleeps
+                for topic in TOPICS:
+                    await ksm.subscribe(topic)
+                _subscribed_sock = sock
+                _epoch += 1
+                logger.info("[kcorders] | 🚀 Subscribed to %s", ", ".join(TOPICS))
+            elif kcsocket.is_dead(ksm):
+                logger.warning("[kcorders] | Private WS is down")
+                break
+            await asyncio.sleep(SUPERVISE_SECS)
+    except Exception as e:
+        logger.warning("[kcorders] | Private WS unavailable: %s", e)
+    finally:
+        if _ksm is ksm:
+            _ksm = None
+            _subscribed_sock = None
+            _next_attempt = monotonic() + RETRY_SECS
+            if _listeners:
+                # someone depends on pushes: come back without waiting for watch()
+                asyncio.get_running_loop().call_later(
+                    RETRY_SECS, lambda: asyncio.ensure_future(start())
+                )
+
+
+async def start() -> bool:
+    """Start the private WS in the background; False while it can't be."""
+    global _ksm, _supervisor
+    if _ksm is not None:
+        return True
+    async with _connect_lock:
+        if _ksm is not None:
+            return True
+        if monotonic() < _next_attempt:
+            return False
+        try:
+            client = Client(
+                api_key=settings.KUCOIN_API_KEY,
+                api_secret=settings.KUCOIN_API_SECRET,
+                passphrase=settings.KUCOIN_API_PASSPHRASE,
+                sandbox=settings.SANDBOX,
+            )
+            ksm = await KucoinSocketManager.create(
+                asyncio.get_running_loop(), client, _handle, private=True
+            )
+        except Exception as e:
+            logger.warning("[kcorders] | Private WS unavailable: %s", e)
+            return False
+        _ksm = ksm
+        _supervisor = asyncio.create_task(_supervise(ksm))
+        return True
+
+
+def add_listener(cb) -> None:
+    if cb not in _listeners:
+        _listeners.append(cb)
+
+
+def remove_listener(cb) -> None:
+    if cb in _listeners:
+        _listeners.remove(cb)
+
+
+async def watch(order_id: str) -> asyncio.Future | None:
+    """
+    Future resolved with the order's 'done' push, or None when the
+    private WS can't be started. Check is_live() before relying on it:
+    the socket may still be connecting or may have dropped.
+    """
+    if not await start():
+        return None
+    fut = _pending.get(order_id)
+    if fut is None:
+        fut = _pending[order_id] = asyncio.get_running_loop().create_future()
+    return fut
+
+
+def unwatch(order_id: str) -> None:
+    _pending.pop(order_id, None)
+
+
+async def close() -> None:
+    global _ksm, _subscribed_sock
+    for fut in _pending.values():
+        fut.cancel()
+    _pending.clear()
+    _listeners.clear()
+    if _supervisor is not None:
+        _supervisor.cancel()
+    if _ksm is not None:
+        ksm, _ksm, _subscribed_sock = _ksm, None, None
+        await kcsocket.close(ksm, TOPICS, "[kcorders]")
+        logger.info("[kcorders] | 🔌 Private WS closed")
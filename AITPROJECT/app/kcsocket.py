@@ -0,0 +1,46 @@
+# app/kcsocket.py
+"""
+Helpers around python-kucoin's KucoinSocketManager.
+
+The manager (2.2.0) has no close(), never raises or clears its socket
+when the connection drops, and doesn't resubscribe after reconnecting,
+so callers need to look at its internals. That access lives here only.
+"""
+
+from kucoin.asyncio import KucoinSocketManager
+from websockets.protocol import State
+from app.logger_config import logger
+
+
+def open_socket(ksm: KucoinSocketManager):
+    """The manager's current websocket if it is open, else None."""
+    sock = ksm._conn._socket
+    if sock is not None and getattr(sock, "state", None) is State.OPEN:
+        return sock
+    return None
+
+
+def is_dead(ksm: KucoinSocketManager) -> bool:
+    """True once the socket is gone and no (re)connect is still running."""
+    return open_socket(ksm) is None and ksm._conn._conn.done()
+
+
+async def close(ksm: KucoinSocketManager, topics=(), tag: str = "[kc]") -> None:
+    """Unsubscribe `topics` and shut the manager's connection down."""
+    sock = open_socket(ksm)
+    if sock is not None:
+        for topic in topics:
+            try:
+                await ksm.unsubscribe(topic)
+            except Exception as e:
+                logger.warning("%s | Unsubscribe %s failed: %s", tag, topic, e)
+        # ends the run loop (ConnectionClosed) ...
+        try:
+            await sock.close()
+        except Exception as e:
+            logger.warning("%s | Socket close failed: %s", tag, e)
+    # ... and cancelling covers a connect still in progress
+    try:
+        await ksm._conn.cancel()
+    except Exception as e:
+        logger.warning("%s | Cancelling WS task failed: %s", tag, e)
@@ -1,17 +1,89 @@
 # app/logger_config.py
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from time import monotonic
 
 from app.config import settings
 LOG_FILE = os.getenv("LOG_FILE", "").strip()
 
-# 1) Create/get your module logger
-logger = logging.getLogger(__name__)
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that buffers formatted records and writes them
+    with one write() and one rollover check per batch: every
+    `batch_size` records, or `flush_interval` seconds after the last
+    write (a small flusher thread covers the idle case).
+    """
+
+    def __init__(self, *args, batch_size: int = 64, flush_interval: float = 0.25, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+        self._buf: list[str] = []
+        self._last_flush = monotonic()
+        # not `_closed`: logging.Handler uses that name for its own bool
+        self._flush_stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="log-flush", daemon=True)
+        self._flusher.start()
+
+    def emit(self, record):
+        # Handler.handle() already holds self.lock here
+        try:
+            self._buf.append(self.format(record) + self.terminator)
+            if (len(self._buf) >= self.batch_size
+                    or monotonic() - self._last_flush >= self.flush_interval):
+                self._write_batch()
+        except Exception:
+            self.handleError(record)
+
+    def _write_batch(self) -> None:
+        """Write out the buffer; caller holds self.lock."""
+        self._last_flush = monotonic()
+        if not self._buf:
+            return
+        data = "".join(self._buf)
+        self._buf.clear()
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes > 0 and 0 < self.stream.tell() + len(data) >= self.maxBytes:
+            self.doRollover()
+        self.stream.write(data)
+        self.stream.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._flush_stop.wait(self.flush_interval):
+            with self.lock:
+                if self._buf and monotonic() - self._last_flush >= self.flush_interval:
+                    try:
+                        self._write_batch()
+                    except Exception:
+                        pass
+
+    def flush(self):
+        with self.lock:
+            self._write_batch()
+        super().flush()
+
+    def close(self):
+        # stop the flusher before the stream goes away; safe to call twice
+        # (explicit close, then logging.shutdown / dictConfig)
+        self._flush_stop.set()
+        if self._flusher.is_alive() and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        self.flush()
+        super().close()
+
+
+# 1) Create/get the app's base logger; modules may hang children off it
+#    (logger.getChild("main") → "app.main") so %(name)s carries the tag
+logger = logging.getLogger("app")
 logger.setLevel(logging.DEBUG)
 
-# 2) File handler (with rotation)
-file_handler = RotatingFileHandler(
+# 2) File handler (with rotation, batched writes)
+file_handler = BatchingRotatingFileHandler(
     LOG_FILE,
     maxBytes=10_000_000,
     backupCount=5,
@@ -19,25 +91,32 @@ file_handler = RotatingFileHandler(
 )
 file_handler.setLevel(logging.DEBUG)
 
-# 3) Formatter (timestamp + level + message only)
+# 3) Formatter (timestamp + level + logger name + message)
 formatter = logging.Formatter(
-    "%(asctime)s - %(levelname)s - %(message)s"
+    "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
 )
 file_handler.setFormatter(formatter)
 
-# 4) Attach to your named logger
-logger.addHandler(file_handler)
-
-# 5) (Optional) also log to console
+# 4) (Optional) also log to console
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
 
-# 6) Apply same handler+formatter to Uvicorn's loggers
+# 5) Callers only enqueue; a listener thread formats and writes, so
+#    file/console I/O never runs on the event loop
+log_queue = queue.SimpleQueue()
+queue_handler = QueueHandler(log_queue)
+listener = QueueListener(
+    log_queue, file_handler, console_handler, respect_handler_level=True
+)
+listener.start()
+atexit.register(listener.stop)
+
+logger.addHandler(queue_handler)
+
+# 6) Route Uvicorn's loggers through the same queue
 for uv_name in ("uvicorn.access", "uvicorn.error"):
     uv_logger = logging.getLogger(uv_name)
     uv_logger.handlers.clear()
-    uv_logger.addHandler(file_handler)
-    uv_logger.addHandler(console_handler)
+    uv_logger.addHandler(queue_handler)
     uv_logger.setLevel(logging.INFO)
     uv_logger.propagate = False
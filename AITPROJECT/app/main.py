@@ -2,24 +2,47 @@
 
 import os
 import asyncio
-import aiofiles
+import platform
+from dataclasses import dataclass
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sse_starlette.sse import EventSourceResponse
+
+try:  # optional: faster JSON bodies
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # optional (Linux): wake the /logs tail on file writes, not a timer
+    from asyncinotify import Inotify, Mask
+except ImportError:
+    Inotify = Mask = None
+
 from app.pubsub import broadcast
 from app.kclivefeed import run_ws
 from app.kc import router as kc_router
 from app.algoapis import router as algo_router
 from app.config import settings, Settings
-from app.logger_config import logger
+from app.logger_config import logger, listener as log_listener
+
+main_log = logger.getChild("main")
+ws_log   = logger.getChild("ws")
 
 # ← Import your DB setup
 from app.db import init_db
 
-app = FastAPI(title=settings.PROJECT_TITLE)
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered straight to bytes by orjson."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+AppJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+app = FastAPI(title=settings.PROJECT_TITLE, default_response_class=AppJSONResponse)
 
 # Include your routers
 app.include_router(kc_router)
@@ -28,6 +51,7 @@ app.include_router(algo_router)
 # ─── Static files & templates ──────────────────────────────────────────────
 BASE_DIR = os.path.dirname(__file__)
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "..", "templates"))
+_INDEX_TMPL = templates.get_template("index.html")
 app.mount(
     "/static",
     StaticFiles(directory=os.path.join(BASE_DIR, "..", "static")),
@@ -37,156 +61,348 @@ app.mount(
 # ─── Initialize DB and broadcaster on startup ───────────────────────────────
 @app.on_event("startup")
 async def startup_event():
-    # 1) Create tables if they don't exist
-    init_db()
+    loop = asyncio.get_running_loop()
+    main_log.info(
+        "Event loop %s.%s on %s %s",
+        type(loop).__module__, type(loop).__name__,
+        platform.system(), platform.release(),
+    )
+    # 1) Create tables if they don't exist (off the loop: migrations can
+    #    take a while on a big trades table)
+    await asyncio.to_thread(init_db)
     # 2) Connect your broadcaster
     await broadcast.connect()
+    # 3) One shared tail of the log file for every /logs client;
+    #    handlers don't change at runtime, so resolve the path once
+    global LOG_TAIL_TASK
+    app.state.log_file = find_log_path(logger)
+    LOG_TAIL_TASK = asyncio.create_task(_log_tailer(app.state.log_file))
+    LOG_TAIL_TASK.add_done_callback(_log_tailer_done)
 
 # ─── Disconnect broadcaster on shutdown ─────────────────────────────────────
 @app.on_event("shutdown")
 async def shutdown_event():
+    if LOG_TAIL_TASK is not None:
+        LOG_TAIL_TASK.cancel()
     await broadcast.disconnect()
 
 # ─── Feed task management ──────────────────────────────────────────────────
-FEED_TASKS: dict[str, asyncio.Task]   = {}
-STOP_EVENTS: dict[str, asyncio.Event] = {}
+@dataclass(slots=True)
+class FeedHandle:
+    task: asyncio.Task
+    stop: asyncio.Event
+
+
+FEEDS: dict[str, FeedHandle] = {}
+# live /ws subscribers per pair; entries go away with their last client,
+# so arbitrary {pair} segments can't grow this without bound
+WS_CLIENTS: dict[str, int] = {}
+
+
+# the page only varies with the base URL that url_for() renders into it
+_INDEX_CACHE: dict[str, bytes] = {}
+_INDEX_CACHE_MAX = 16  # Host is client-controlled: don't let it grow unbounded
 
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    config_dict = {}
-    for key in dir(settings):
-        if key.startswith("__") or callable(getattr(settings, key)):
-            continue
-        value = getattr(settings, key)
-        if any(s in key.upper() for s in ["SECRET", "PASSPHRASE", "KEY", "TOKEN"]):
-            config_dict[key] = mask_value(value)
-        else:
-            config_dict[key] = value
-
-    return templates.TemplateResponse(
-        "index.html", 
-        {
-            "request": request,
-            "default_pair": settings.DEFAULT_PAIR,
-            "config": config_dict
-        }
-    )
+    base = str(request.base_url)
+    body = _INDEX_CACHE.get(base)
+    if body is None:
+        body = _INDEX_TMPL.render(
+            request=request,
+            default_pair=settings.DEFAULT_PAIR,
+            config=_SAFE_CONFIG,
+        ).encode()
+        if len(_INDEX_CACHE) < _INDEX_CACHE_MAX:
+            _INDEX_CACHE[base] = body
+    return HTMLResponse(body)
+
+
+# plain Starlette route: no dependency resolution or JSON encoding per probe
+_HEALTH = Response(b'{"status":"ok"}', media_type="application/json")
+
 
+async def health(request: Request) -> Response:
+    return _HEALTH
+
+app.add_route("/health", health, methods=["GET"], include_in_schema=False)
+
+_MASK_CACHE: dict[int, str] = {}
 
-@app.get("/health")
-async def health():
-    return {"status": "ok"}
 
 def mask_value(value: str) -> str:
-    if not isinstance(value, str):
+    if type(value) is not str:
         return value
-    if len(value) <= 6:
-        return "*" * len(value)
-    return f"{value[:3]}{'*' * (len(value) - 6)}{value[-3:]}"
+    n = len(value)
+    k = n if n <= 6 else n - 6
+    stars = _MASK_CACHE.get(k)
+    if stars is None:
+        stars = _MASK_CACHE[k] = "*" * k
+    if n <= 6:
+        return stars
+    return value[:3] + stars + value[-3:]
 
-@app.get("/config")
-def get_config():
-    config_dict = {}
-    for key in dir(Settings):
-        # Skip private attributes and methods
-        if key.startswith("__") or callable(getattr(Settings, key)):
-            continue
+_SENSITIVE = ("SECRET", "PASSPHRASE", "KEY", "TOKEN")
 
-        value = getattr(Settings, key)
 
-        if any(s in key.upper() for s in ["SECRET", "PASSPHRASE", "KEY", "TOKEN"]):
-            config_dict[key] = mask_value(value)
-        else:
-            config_dict[key] = value
-    return config_dict
+def _build_config(attrs: dict) -> dict:
+    """Public view of a settings namespace, with credential-like values masked."""
+    # Skip private attributes and methods
+    return {
+        key: mask_value(value) if any(s in key.upper() for s in _SENSITIVE) else value
+        for key, value in attrs.items()
+        if not key.startswith("_") and not callable(value)
+    }
+
+
+# Settings is a plain class, so its __dict__ is exactly the declared
+# options (the instance only holds overrides, if any).
+# settings are fixed for the process lifetime: build these once
+_SAFE_CONFIG       = _build_config({**vars(Settings), **vars(settings)})
+_SAFE_CONFIG_CLASS = _build_config(vars(Settings))
+
+
+@app.get("/config")
+def get_config():
+    return _SAFE_CONFIG_CLASS
 
 @app.post("/start/{pair}")
 async def start_feed(pair: str):
-    if pair in FEED_TASKS and not FEED_TASKS[pair].done():
-        return JSONResponse(
+    feed = FEEDS.get(pair)
+    if feed is not None and not feed.task.done():
+        return AppJSONResponse(
             {"error": f"feed for {pair} already running"},
             status_code=400
         )
 
     stop_evt = asyncio.Event()
-    STOP_EVENTS[pair] = stop_evt
-    FEED_TASKS[pair] = asyncio.create_task(run_ws(pair, stop_evt))
+    FEEDS[pair] = FeedHandle(asyncio.create_task(run_ws(pair, stop_evt)), stop_evt)
 
-    logger.info("[main] | 🚀 Started feed for %s", pair)
+    main_log.info("🚀 Started feed for %s", pair)
     return {"status": "running", "pair": pair}
 
 @app.post("/stop/{pair}")
 async def stop_feed_pair(pair: str):
-    if pair not in FEED_TASKS:
-        return JSONResponse(
+    feed = FEEDS.pop(pair, None)
+    if feed is None:
+        return AppJSONResponse(
             {"error": f"no feed running for {pair}"},
             status_code=404
         )
 
-    STOP_EVENTS[pair].set()
+    feed.stop.set()
     try:
-        await asyncio.wait_for(FEED_TASKS[pair], timeout=5.0)
+        await asyncio.wait_for(feed.task, timeout=5.0)
     except asyncio.TimeoutError:
-        logger.warning("[main] | ✋ Feed task for %s hung, cancelling", pair)
-        FEED_TASKS[pair].cancel()
-
-    del FEED_TASKS[pair]
-    del STOP_EVENTS[pair]
+        main_log.warning("✋ Feed task for %s hung, cancelling", pair)
+        feed.task.cancel()
 
-    logger.info("[main] | 🛑 Stopped feed for %s", pair)
+    main_log.info("🛑 Stopped feed for %s", pair)
     return {"status": "stopped", "pair": pair}
 
 @app.post("/stop")
 async def stop_all():
-    for evt in STOP_EVENTS.values():
-        evt.set()
-    await asyncio.gather(*FEED_TASKS.values(), return_exceptions=True)
-    FEED_TASKS.clear()
-    STOP_EVENTS.clear()
-    logger.info("[main] | 🧹 Stopped all feeds")
+    feeds = list(FEEDS.values())
+    FEEDS.clear()
+    for feed in feeds:
+        feed.stop.set()
+    if feeds:
+        # same 5 s grace as stop_feed_pair, then cancel whatever ignored stop_evt
+        _, pending = await asyncio.wait([f.task for f in feeds], timeout=5.0)
+        for t in pending:
+            t.cancel()
+        if pending:
+            main_log.warning("✋ %d feed task(s) hung, cancelled", len(pending))
+            await asyncio.gather(*pending, return_exceptions=True)
+    main_log.info("🧹 Stopped all feeds")
     return {"status": "stopped_all"}
 
 # ─── WebSocket endpoint ────────────────────────────────────────────────────
+WS_QUEUE_MAX = 256  # ticks buffered per client before it is dropped as too slow
+
+
+async def _ws_writer(ws: WebSocket, out: asyncio.Queue):
+    # everything that piled up since the last send goes out as one frame
+    # of back-to-back 24-byte ticks
+    while True:
+        batch = [await out.get()]
+        while not out.empty():
+            batch.append(out.get_nowait())
+        await ws.send_bytes(b"".join(batch))
+
+
 @app.websocket("/ws/{pair}")
 async def ws_endpoint(ws: WebSocket, pair: str):
     await ws.accept()
+    clients = WS_CLIENTS.get(pair, 0)
+    if clients >= settings.WS_MAX_CLIENTS_PER_PAIR:
+        # at capacity: 1013 "try again later" instead of queueing another reader
+        ws_log.warning("🚫 Subscriber limit reached for %s", pair)
+        await ws.close(code=1013)
+        return
+
+    WS_CLIENTS[pair] = clients + 1
     channel = f"price_feed:{pair}"
-
-    async with broadcast.subscribe(channel=channel) as subscriber:
-        try:
-            async for event in subscriber:
-                await ws.send_text(event.message)
-        except WebSocketDisconnect:
-            logger.info("[ws] | 📴 Client disconnected for %s", pair)
-        except Exception as err:
-            logger.error("[ws] | ⚠️ Unexpected error for %s: %s", pair, err)
+    out: asyncio.Queue[bytes] = asyncio.Queue(maxsize=WS_QUEUE_MAX)
+    writer = asyncio.create_task(_ws_writer(ws, out))
+    try:
+        async with broadcast.subscribe(channel=channel) as subscriber:
+            try:
+                async for event in subscriber:
+                    if writer.done():
+                        await writer  # re-raise the send failure below
+                    try:
+                        out.put_nowait(event.message)
+                    except asyncio.QueueFull:
+                        # don't let one slow reader hold up the channel
+                        ws_log.warning("🐢 Dropping slow client for %s", pair)
+                        writer.cancel()
+                        await ws.close(code=1013)
+                        break
+            except WebSocketDisconnect:
+                ws_log.info("📴 Client disconnected for %s", pair)
+            except Exception as err:
+                ws_log.error("⚠️ Unexpected error for %s: %s", pair, err)
+    finally:
+        writer.cancel()
+        clients = WS_CLIENTS[pair] - 1
+        if clients:
+            WS_CLIENTS[pair] = clients
+        else:
+            del WS_CLIENTS[pair]
 
 # ─── Log‐streaming & status endpoints ────────────────────────────────────────
 def find_log_path(logger) -> str:
-    for h in logger.handlers:
+    # the file handler sits behind the QueueListener, not on the logger
+    for h in (*logger.handlers, *log_listener.handlers):
         if hasattr(h, "baseFilename"):
             return h.baseFilename
     raise RuntimeError("No FileHandler attached to logger")
 
-async def log_event_generator(request: Request, log_file: str):
-    async with aiofiles.open(log_file, mode="r") as f:
-        await f.seek(0, os.SEEK_END)
+LOG_IDLE_CHECK_SECS = 1.0  # how often an idle /logs client (or the tailer) re-checks
+LOG_QUEUE_MAX = 1000       # lines buffered per client; a stalled client misses lines
+SSE_HEADERS = {"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+
+LOG_SUBSCRIBERS: set[asyncio.Queue] = set()
+LOG_TAIL_TASK: asyncio.Task | None = None
+
+
+def _watch_log(log_file: str):
+    """Inotify watching `log_file` for writes and rollover, or None (→ 200 ms polling)."""
+    if Inotify is None:
+        return None
+    try:
+        inotify = Inotify()
+        inotify.add_watch(log_file, Mask.MODIFY | Mask.MOVE_SELF | Mask.DELETE_SELF)
+        return inotify
+    except OSError as e:
+        main_log.warning("inotify unavailable for %s (%s); polling", log_file, e)
+        return None
+
+
+def _fan_out(lines: list[bytes]) -> None:
+    if not LOG_SUBSCRIBERS:
+        return
+    for line in lines:
+        frame = b"data: " + line.rstrip() + b"\n\n"
+        for q in LOG_SUBSCRIBERS:
+            try:
+                q.put_nowait(frame)
+            except asyncio.QueueFull:
+                pass
+
+
+def _log_rotated(fd: int, log_file: str) -> bool | None:
+    """True once `log_file` names a different inode than the one `fd` reads,
+    None mid-rollover (renamed away, new file not created yet)."""
+    try:
+        return os.stat(log_file).st_ino != os.fstat(fd).st_ino
+    except FileNotFoundError:
+        return None
+
+
+async def _log_tailer(log_file: str):
+    """Tail `log_file` once and fan each new line out to LOG_SUBSCRIBERS
+    as a ready-to-send SSE frame, following it across rollovers."""
+    # one non-blocking 64 KiB read per tick instead of an executor hop per line
+    fd = os.open(log_file, os.O_RDONLY | os.O_NONBLOCK)
+    inotify = _watch_log(log_file)
+    try:
+        os.lseek(fd, 0, os.SEEK_END)
+        leftover = b""
         while True:
-            if await request.is_disconnected():
-                break
-            line = await f.readline()
-            if not line:
+            data = os.read(fd, 65536)
+            if data:
+                *lines, leftover = (leftover + data).split(b"\n")
+                _fan_out(lines)
+                continue
+            rotated = _log_rotated(fd, log_file)
+            if rotated is None:
+                await asyncio.sleep(0.05)
+                continue
+            if rotated:
+                # old file is drained: switch to the new one from its start
+                if leftover:
+                    _fan_out([leftover])
+                    leftover = b""
+                os.close(fd)
+                if inotify is not None:
+                    inotify.close()
+                fd = os.open(log_file, os.O_RDONLY | os.O_NONBLOCK)
+                inotify = _watch_log(log_file)
+                continue
+            if inotify is None:
                 await asyncio.sleep(0.2)
                 continue
-            yield {"data": line.rstrip()}
+            # sleep until the file is written or moved away
+            try:
+                await asyncio.wait_for(inotify.get(), LOG_IDLE_CHECK_SECS)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        os.close(fd)
+        if inotify is not None:
+            inotify.close()
+
+
+def _log_tailer_done(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        main_log.error("Log tailer stopped, /logs is silent: %r", task.exception())
+
+
+async def log_event_generator(request: Request):
+    q: asyncio.Queue[bytes] = asyncio.Queue(maxsize=LOG_QUEUE_MAX)
+    LOG_SUBSCRIBERS.add(q)
+    try:
+        while True:
+            try:
+                frame = await asyncio.wait_for(q.get(), LOG_IDLE_CHECK_SECS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                continue
+            # flush whatever else is queued in the same chunk
+            if q.empty():
+                yield frame
+            else:
+                frames = [frame]
+                while not q.empty():
+                    frames.append(q.get_nowait())
+                yield b"".join(frames)
+    finally:
+        LOG_SUBSCRIBERS.discard(q)
 
 @app.get("/logs")
 async def logs(request: Request):
-    log_file = find_log_path(logger)
-    return EventSourceResponse(log_event_generator(request, log_file))
+    return StreamingResponse(
+        log_event_generator(request),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
 
 @app.get("/feed/status/{pair}")
 async def feed_status(pair: str):
-    running = pair in FEED_TASKS and not FEED_TASKS[pair].done()
+    feed = FEEDS.get(pair)
+    running = feed is not None and not feed.task.done()
     return {"running": running}
@@ -31,12 +31,14 @@ function closeWS() {
 
 // 6) In ws.onmessage handler, when you get a real tick:
 ws.onmessage = ev => {
-  if (!ev.data.startsWith('{')) {
-    // real tick
-    const [ts, p]     = ev.data.split(',');
-    const unixSec     = Math.floor(Number(ts) / 1e9);
+  if (ev.data instanceof ArrayBuffer) {
+    // real ticks: u64 ts (ns), f64 price, f64 size, little-endian,
+    // 24 bytes each; the stats only need the newest one in the frame
+    const view        = new DataView(ev.data);
+    const off         = view.byteLength - 24;
+    const unixSec     = Math.floor(Number(view.getBigUint64(off, true)) / 1e9);
     statLast.textContent  = new Date(unixSec * 1000).toLocaleTimeString();
-    statPrice.textContent = parseFloat(p).toFixed(6);
+    statPrice.textContent = view.getFloat64(off + 8, true).toFixed(6);
     // … your existing tick logic …
   }
   else {
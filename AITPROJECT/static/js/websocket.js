@@ -42,6 +42,7 @@ document.addEventListener('DOMContentLoaded', () => {
     if (running) return;
     const proto = location.protocol === 'https:' ? 'wss' : 'ws';
     ws = new WebSocket(`${proto}://${location.host}/ws/${pairSel.value}`);
+    ws.binaryType = 'arraybuffer';
 
     ws.onopen = () => {
       running           = true;
@@ -58,17 +59,27 @@ document.addEventListener('DOMContentLoaded', () => {
     ws.onerror = e => console.error("WS error", e);
 
     ws.onmessage = ev => {
-      const [ts, p] = ev.data.split(",");
-      if (!ts || !p) return;
-      // compute localTime in seconds (align with chart timeScale)
-      const localTime = Number(ts) / 1e9 - (new Date().getTimezoneOffset() * 60);
-      // record first tick
-      if (!firstTickTime) {
-        firstTickTime = localTime;
+      // a frame holds one or more ticks of 24 bytes little-endian:
+      // u64 ts (ns), f64 price, f64 size
+      if (!(ev.data instanceof ArrayBuffer) || ev.data.byteLength < 24) return;
+      const view = new DataView(ev.data);
+      let lastTs = 0, lastP = 0;
+      for (let off = 0; off + 24 <= view.byteLength; off += 24) {
+        const ts = Number(view.getBigUint64(off, true));
+        const p  = view.getFloat64(off + 8, true);
+        if (!ts || !p) continue;
+        // compute localTime in seconds (align with chart timeScale)
+        const localTime = ts / 1e9 - (new Date().getTimezoneOffset() * 60);
+        // record first tick
+        if (!firstTickTime) {
+          firstTickTime = localTime;
+        }
+        lineSeries.update({ time: localTime, value: p });
+        lastTs = ts; lastP = p;
       }
-      lineSeries.update({ time: localTime, value: +p });
-      priceEl.textContent = p;
-      lastEl.textContent  = new Date(Number(ts) / 1e6).toLocaleTimeString();
+      if (!lastTs) return;
+      priceEl.textContent = lastP;
+      lastEl.textContent  = new Date(lastTs / 1e6).toLocaleTimeString();
     };
   }
 